@@ -3,24 +3,50 @@ from __future__ import annotations
 import asyncio
 from datetime import datetime, timezone
 import logging
+import shutil
+import time
 from typing import Dict, List
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks, Request
 from fastapi.responses import StreamingResponse
-import json
+import orjson
 
 from agent_app.config import Settings, get_settings
 from agent_app.graph import RoutePlannerGraph
 from agent_app.models import PlanCreateRequest, PlanResult, PlanRunStatus, TerrainBundleCreate, TerrainBundleSummary
+from agent_app.progress import get_progress_broker
+from agent_app.tools.local_terrain import ARCHIVE_HEADER_BYTES, ArchiveKind, detect_archive
+from agent_app.workers import get_terrain_executor, register_terrain_bundle
 
 router = APIRouter(prefix="/api/v1", tags=["planner"])
 
-# Store upload progress
-upload_progress: Dict[str, dict] = {}
+# Seconds between SSE keep-alive comments while an upload is idle
+SSE_KEEPALIVE_SECONDS = 21
+TERMINAL_UPLOAD_STATUSES = ("completed", "error")
+# Finished uploads stay readable this long after their SSE stream closes
+UPLOAD_STATUS_GRACE_SECONDS = 60
+# A stream opened before the upload's first update waits this long for it, checking this often
+UPLOAD_FIRST_EVENT_TIMEOUT_SECONDS = 30
+UPLOAD_FIRST_EVENT_POLL_SECONDS = 0.5
 
+# Non-terminal progress updates closer together than this are coalesced
+PROGRESS_MIN_INTERVAL_SECONDS = 0.05
 
-def get_graph() -> RoutePlannerGraph:
-    return RoutePlannerGraph()
+_UTC = timezone.utc
+_SPACE_TABLE = str.maketrans(" ", "_")
+
+# Per-upload publish time and the newest update held back by the throttle
+_last_progress_at: Dict[str, float] = {}
+_pending_progress: Dict[str, dict] = {}
+_flush_tasks: set[asyncio.Task] = set()
+
+# Uploads are copied to disk in 1 MiB chunks so peak memory stays flat regardless of file size
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+
+def get_graph(request: Request) -> RoutePlannerGraph:
+    # Built once per worker in the app startup hook; see agent_app.main.create_app
+    return request.app.state.graph
 
 
 def get_settings_dep() -> Settings:
@@ -28,53 +54,100 @@ def get_settings_dep() -> Settings:
 
 
 @router.get("/terrain", response_model=List[TerrainBundleSummary])
-def list_terrain_bundles(
+async def list_terrain_bundles(
     graph: RoutePlannerGraph = Depends(get_graph),
 ) -> List[TerrainBundleSummary]:
     """List all available terrain bundles."""
-    bundles = graph.terrain_tool.list_bundles()
-    return [TerrainBundleSummary(**bundle) for bundle in bundles]
+    bundles = await asyncio.to_thread(graph.terrain_tool.list_bundles)
+    # Built by LocalTerrainTool, so skip re-validating every entry
+    return [TerrainBundleSummary.model_construct(**bundle) for bundle in bundles]
+
+
+async def _publish_progress(upload_id: str, state: dict) -> None:
+    _pending_progress.pop(upload_id, None)
+    if state["status"] in TERMINAL_UPLOAD_STATUSES:
+        _last_progress_at.pop(upload_id, None)
+    else:
+        _last_progress_at[upload_id] = time.monotonic()
+    await get_progress_broker().set(upload_id, state)
+
+
+async def _flush_progress_later(upload_id: str, delay: float) -> None:
+    await asyncio.sleep(delay)
+    state = _pending_progress.get(upload_id)
+    if state is not None:
+        await _publish_progress(upload_id, state)
 
 
-def process_terrain_background(upload_id: str, name: str, file_path, description: str = None):
-    """Background task to process terrain bundle."""
+def _forget_progress(upload_id: str) -> None:
+    """Drop the throttle state of an upload that ended without a terminal update."""
+    _pending_progress.pop(upload_id, None)
+    _last_progress_at.pop(upload_id, None)
+
+
+async def _set_progress(upload_id: str, state: dict) -> None:
+    """Publish an update, coalescing bursts of non-terminal updates."""
+    if state["status"] not in TERMINAL_UPLOAD_STATUSES:
+        elapsed = time.monotonic() - _last_progress_at.get(upload_id, 0.0)
+        if elapsed < PROGRESS_MIN_INTERVAL_SECONDS:
+            # Keep only the newest update and publish it once the interval has passed
+            if upload_id not in _pending_progress:
+                task = asyncio.create_task(
+                    _flush_progress_later(upload_id, PROGRESS_MIN_INTERVAL_SECONDS - elapsed)
+                )
+                _flush_tasks.add(task)
+                task.add_done_callback(_flush_tasks.discard)
+            _pending_progress[upload_id] = state
+            return
+    await _publish_progress(upload_id, state)
+
+
+def _save_upload(first_chunk: bytes, src, file_path) -> int:
+    """Write the sniffed first chunk, then copy the rest of the spooled upload to disk."""
+    with open(file_path, "wb") as out:
+        out.write(first_chunk)
+        shutil.copyfileobj(src, out, length=UPLOAD_CHUNK_SIZE)
+        return out.tell()
+
+
+async def process_terrain_background(
+    upload_id: str,
+    name: str,
+    file_path,
+    archive_kind: ArchiveKind,
+    file_size: int,
+    description: str = None,
+):
+    """Background task that hands terrain conversion to the worker process pool."""
     logger = logging.getLogger("uvicorn")
     
     try:
-        import os
-        file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+        file_size_mb = file_size / (1024 * 1024)
         
-        # Check if OSM PBF file
-        from agent_app.tools.osm_converter import OSMConverter
-        is_osm = OSMConverter.is_osm_pbf(file_path)
-        
-        if is_osm:
+        if archive_kind == "osm":
             # Warn about large files
             if file_size_mb > 1000:  # > 1GB
-                upload_progress[upload_id] = {
+                await _set_progress(upload_id, {
                     "status": "processing", 
                     "message": f"Processing large OSM file ({file_size_mb:.1f} MB). This may take 10-20 minutes...", 
                     "progress": 15
-                }
+                })
                 logger.warning(f"⚠️  Large OSM file detected: {file_size_mb:.1f} MB - processing may take a long time")
             else:
-                upload_progress[upload_id] = {"status": "processing", "message": "Detected OSM PBF file, preparing conversion...", "progress": 15}
+                await _set_progress(upload_id, {"status": "processing", "message": "Detected OSM PBF file, preparing conversion...", "progress": 15})
         else:
-            upload_progress[upload_id] = {"status": "processing", "message": "Extracting archive...", "progress": 15}
-        
-        upload_progress[upload_id] = {"status": "processing", "message": "Converting roads from OSM data...", "progress": 20}
+            await _set_progress(upload_id, {"status": "processing", "message": "Extracting archive...", "progress": 15})
         
-        graph = RoutePlannerGraph()
+        await _set_progress(upload_id, {"status": "processing", "message": "Converting roads from OSM data...", "progress": 20})
         
-        upload_progress[upload_id] = {"status": "processing", "message": "Extracting obstacles (buildings, water, etc)...", "progress": 60}
+        await _set_progress(upload_id, {"status": "processing", "message": "Extracting obstacles (buildings, water, etc)...", "progress": 60})
         
-        bundle = graph.terrain_tool.register(
-            name,
-            archive_path=file_path,
-            auto_activate=True,
+        loop = asyncio.get_running_loop()
+        bundle = await loop.run_in_executor(
+            get_terrain_executor(), register_terrain_bundle, name, file_path
         )
         
-        upload_progress[upload_id] = {
+        await _set_progress(upload_id, {
             "status": "completed",
             "message": "Terrain bundle ready! Refresh to see it in the dropdown.",
             "progress": 100,
@@ -83,15 +156,18 @@ def process_terrain_background(upload_id: str, name: str, file_path, description
                 "name": name,
                 "description": description,
             }
-        }
+        })
         logger.info(f"✅ Terrain bundle registered: {bundle.terrain_id}")
     except Exception as e:
         logger.error(f"❌ Failed to process terrain: {str(e)}")
-        upload_progress[upload_id] = {
+        await _set_progress(upload_id, {
             "status": "error",
             "message": f"Failed: {str(e)}. Try a smaller region (state-level instead of multi-state).",
             "progress": 0
-        }
+        })
+    finally:
+        # Covers cancellation and a failed error publish; terminal updates already cleared it
+        _forget_progress(upload_id)
 
 
 @router.post("/terrain/upload")
@@ -105,29 +181,48 @@ async def upload_terrain(
     """Upload a terrain bundle archive (processes in background)."""
     logger = logging.getLogger("uvicorn")
     
-    upload_id = f"{name.replace(' ', '_')}_{int(datetime.now().timestamp())}"
+    upload_id = f"{name.translate(_SPACE_TABLE)}_{int(time.time())}"
     logger.info(f"📤 Upload started: {file.filename} (name: {name}, id: {upload_id})")
     
     # Save the uploaded file
-    upload_path = settings.data_root / "uploads"
-    upload_path.mkdir(parents=True, exist_ok=True)
+    file_path = settings.uploads_dir / file.filename
     
-    file_path = upload_path / file.filename
+    # Sniff the first chunk so unsupported files are rejected before anything is written
+    chunk = await file.read(UPLOAD_CHUNK_SIZE)
+    archive_kind = detect_archive(chunk[:ARCHIVE_HEADER_BYTES])
+    if archive_kind == "invalid":
+        logger.warning(f"🚫 Rejected upload {file.filename}: unsupported file type")
+        raise HTTPException(
+            status_code=400,
+            detail="Unsupported file type; upload a ZIP or TAR bundle or an OSM PBF extract",
+        )
     logger.info(f"💾 Saving to: {file_path}")
     
-    upload_progress[upload_id] = {"status": "uploading", "message": "Saving file...", "progress": 5}
+    await _set_progress(upload_id, {"status": "uploading", "message": "Saving file...", "progress": 5})
     
-    with open(file_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    # One thread hop for the whole copy instead of an await per chunk
+    try:
+        bytes_written = await asyncio.to_thread(_save_upload, chunk, file.file, file_path)
+    except Exception as e:
+        logger.error(f"❌ Failed to save upload: {str(e)}")
+        await _set_progress(upload_id, {"status": "error", "message": f"Failed to save file: {str(e)}", "progress": 0})
+        raise
     
-    file_size_mb = file_path.stat().st_size / (1024 * 1024)
+    file_size_mb = bytes_written / (1024 * 1024)
     logger.info(f"✅ File saved: {file_size_mb:.2f} MB")
     
-    upload_progress[upload_id] = {"status": "uploaded", "message": f"File saved ({file_size_mb:.1f} MB)", "progress": 8}
+    await _set_progress(upload_id, {"status": "uploaded", "message": f"File saved ({file_size_mb:.1f} MB)", "progress": 8})
     
     # Process in background
-    background_tasks.add_task(process_terrain_background, upload_id, name, file_path, description)
+    background_tasks.add_task(
+        process_terrain_background,
+        upload_id,
+        name,
+        file_path,
+        archive_kind,
+        bytes_written,
+        description,
+    )
     
     return {"upload_id": upload_id, "message": "Upload received, processing in background"}
 
@@ -135,24 +230,42 @@ async def upload_terrain(
 @router.get("/terrain/upload/{upload_id}/status")
 async def get_upload_status(upload_id: str):
     """Get status of a terrain upload."""
-    if upload_id not in upload_progress:
+    progress = await get_progress_broker().get(upload_id)
+    if progress is None:
         raise HTTPException(status_code=404, detail="Upload not found")
-    return upload_progress[upload_id]
+    return progress
 
 
 @router.get("/terrain/upload/{upload_id}/progress")
 async def stream_upload_progress(upload_id: str):
     """Stream real-time progress updates via SSE."""
+    broker = get_progress_broker()
+
     async def event_generator():
-        while True:
-            if upload_id in upload_progress:
-                progress = upload_progress[upload_id]
-                yield f"data: {json.dumps(progress)}\n\n"
-                
-                if progress["status"] in ["completed", "error"]:
+        # The client may connect before the upload publishes anything; wait for it to appear
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + UPLOAD_FIRST_EVENT_TIMEOUT_SECONDS
+        while await broker.get(upload_id) is None:
+            if loop.time() >= deadline:
+                yield b"data: " + orjson.dumps(
+                    {"status": "error", "message": "Upload not found", "progress": 0}
+                ) + b"\n\n"
+                return
+            await asyncio.sleep(UPLOAD_FIRST_EVENT_POLL_SECONDS)
+
+        # Subscribe before reading the snapshot so no update slips in between
+        async with broker.subscribe(upload_id) as updates:
+            progress = await broker.get(upload_id)
+            while progress is not None:
+                yield b"data: " + orjson.dumps(progress) + b"\n\n"
+
+                if progress["status"] in TERMINAL_UPLOAD_STATUSES:
+                    # Keep the final state around briefly for late /status polls
+                    await broker.expire(upload_id, UPLOAD_STATUS_GRACE_SECONDS)
                     break
-            
-            await asyncio.sleep(0.5)
+
+                while (progress := await updates.next(SSE_KEEPALIVE_SECONDS)) is None:
+                    yield b": keep-alive\n\n"
     
     return StreamingResponse(
         event_generator(),
@@ -165,18 +278,18 @@ async def stream_upload_progress(upload_id: str):
 
 
 @router.post("/terrain", response_model=PlanRunStatus)
-def register_terrain(
+async def register_terrain(
     request: TerrainBundleCreate,
-    settings: Settings = Depends(get_settings_dep),
+    graph: RoutePlannerGraph = Depends(get_graph),
 ) -> PlanRunStatus:
-    # TODO: wire into LocalTerrainTool.register and persist metadata
-    graph = RoutePlannerGraph()
-    bundle = graph.terrain_tool.register(
+    """Register a terrain bundle from an archive already on the server."""
+    bundle = await asyncio.to_thread(
+        graph.terrain_tool.register,
         request.name,
         archive_path=request.bundle_path,
         auto_activate=request.auto_activate,
     )
-    now = datetime.now(timezone.utc)
+    now = datetime.now(_UTC)
     return PlanRunStatus(
         run_id=bundle.terrain_id,
         status="completed",
@@ -187,12 +300,12 @@ def register_terrain(
 
 
 @router.post("/plans", response_model=PlanResult)
-def create_plan(
+async def create_plan(
     request: PlanCreateRequest,
     graph: RoutePlannerGraph = Depends(get_graph),
 ) -> PlanResult:
     try:
-        result = graph.run(
+        result = await graph.arun(
             terrain_id=request.terrain_id,
             start_lat=request.start_lat,
             start_lon=request.start_lon,
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Optional, List
 
@@ -34,11 +34,27 @@ class Settings(BaseSettings):
         default="llama3.1:8b",
         description="Ollama model identifier used for decision making",
     )
+    terrain_workers: int = Field(
+        default=2,
+        ge=1,
+        description="Number of worker processes used for terrain bundle conversion",
+    )
+    redis_url: Optional[str] = Field(
+        default=None,
+        description="Redis URL used to share upload progress across API workers",
+    )
     cors_allow_origins: List[str] = Field(
         default_factory=lambda: ["http://localhost:3000", "http://127.0.0.1:3000"],
         description="Comma separated list of origins allowed for CORS",
     )
 
+    @cached_property
+    def uploads_dir(self) -> Path:
+        """Directory where raw uploads are staged before conversion."""
+        path = self.data_root / "uploads"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
     class Config:
         env_prefix = "ROUTE_AGENT_"
         env_file = ".env"
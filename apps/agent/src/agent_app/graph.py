@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-import json
 from typing import Any, Dict
 
+import orjson
 from langgraph.graph import END, START, StateGraph
 
 from agent_app.tools import (
@@ -47,6 +47,8 @@ class RoutePlannerGraph:
             logger.info(f"🗺️  Starting route planning from {start} to {end}")
             logger.info(f"📊 Loading terrain data from {terrain.terrain_id}...")
             state["route_response"] = self.route_tool.generate_routes(terrain, start, end)
+            for route in state["route_response"].get("routes", []):
+                route["distance_km"] = round(route["distance_m"] / 1000, 2)
             logger.info(f"✅ Generated {len(state['route_response'].get('routes', []))} route candidates")
             logger.debug(
                 "Generated routes",
@@ -56,19 +58,18 @@ class RoutePlannerGraph:
             )
             return state
 
-        def review_routes(state: Dict[str, Any]) -> Dict[str, Any]:
+        async def review_routes(state: Dict[str, Any]) -> Dict[str, Any]:
             route_payload = state["route_response"]
             routes = route_payload.get("routes", [])
-            summary = []
-            for route in routes:
-                summary.append(
-                    {
-                        "id": route["id"],
-                        "distance_km": round(route["distance_m"] / 1000, 2),
-                        "estimated_cost": route["estimated_cost"],
-                        "coverage": route.get("coverage", {}),
-                    }
-                )
+            summary = [
+                {
+                    "id": route["id"],
+                    "distance_km": route["distance_km"],
+                    "estimated_cost": route["estimated_cost"],
+                    "coverage": route.get("coverage", {}),
+                }
+                for route in routes
+            ]
 
             messages = [
                 SystemMessage(
@@ -84,15 +85,18 @@ class RoutePlannerGraph:
                     ).format(
                         preference=state.get("preference", "balanced"),
                         policy=state.get("policy", "prefer_low_risk"),
-                        summary=json.dumps(summary, indent=2),
+                        # Compact output: the model does not need the whitespace
+                        summary=orjson.dumps(summary).decode(),
                     )
                 ),
             ]
 
+            parts: list[str] = []
             try:
                 llm = get_llm()
-                response = llm.invoke(messages)
-                content = getattr(response, "content", str(response))
+                async for chunk in llm.astream(messages):
+                    parts.append(chunk.content)
+                content = "".join(parts)
             except Exception as exc:  # noqa: BLE001
                 content = (
                     "Ollama decision step failed. Verify the Ollama daemon is running and the model "
@@ -117,7 +121,3 @@ class RoutePlannerGraph:
     async def arun(self, **kwargs: Any) -> Dict[str, Any]:
         state = dict(kwargs)
         return await self.graph.ainvoke(state)
-
-    def run(self, **kwargs: Any) -> Dict[str, Any]:
-        state = dict(kwargs)
-        return self.graph.invoke(state)
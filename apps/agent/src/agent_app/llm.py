@@ -1,16 +1,98 @@
 from __future__ import annotations
 
 from functools import lru_cache
+from typing import Any, AsyncIterator, List, Optional
 
+import httpx
 from langchain_community.chat_models import ChatOllama
+from langchain_community.llms.ollama import OllamaEndpointNotFoundError
 from langchain_core.language_models.chat_models import BaseChatModel
 
 from agent_app.config import get_settings
 
+# Idle Ollama connections are kept open this long between plans
+OLLAMA_KEEPALIVE_SECONDS = 300.0
+
+
+@lru_cache(maxsize=1)
+def get_ollama_client() -> httpx.AsyncClient:
+    """Return the pooled HTTP client shared by every Ollama request in this process."""
+
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(120.0),
+        limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=OLLAMA_KEEPALIVE_SECONDS),
+    )
+
+
+async def close_ollama_client() -> None:
+    if get_ollama_client.cache_info().currsize:
+        await get_ollama_client().aclose()
+        get_ollama_client.cache_clear()
+
+
+class PooledChatOllama(ChatOllama):
+    """ChatOllama whose async calls reuse one keep-alive client instead of a session per call."""
+
+    async def _acreate_stream(
+        self,
+        api_url: str,
+        payload: Any,
+        stop: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[str]:
+        # Request body mirrors _OllamaCommon._acreate_stream in langchain-community 0.2.19, the
+        # version pinned in pyproject.toml; re-sync this copy whenever that pin moves
+        if self.stop is not None and stop is not None:
+            raise ValueError("`stop` found in both the input and default params.")
+        elif self.stop is not None:
+            stop = self.stop
+
+        params = self._default_params
+        for key in self._default_params:
+            if key in kwargs:
+                params[key] = kwargs[key]
+
+        if "options" in kwargs:
+            params["options"] = kwargs["options"]
+        else:
+            params["options"] = {
+                **params["options"],
+                "stop": stop,
+                **{k: v for k, v in kwargs.items() if k not in self._default_params},
+            }
+
+        if payload.get("messages"):
+            request_payload = {"messages": payload.get("messages", []), **params}
+        else:
+            request_payload = {
+                "prompt": payload.get("prompt"),
+                "images": payload.get("images", []),
+                **params,
+            }
+
+        async with get_ollama_client().stream(
+            "POST",
+            api_url,
+            headers=self.headers if isinstance(self.headers, dict) else None,
+            # A (user, password) tuple or a callable, as with the requests-based sync path
+            auth=self.auth if self.auth is not None else httpx.USE_CLIENT_DEFAULT,
+            json=request_payload,
+            timeout=self.timeout if self.timeout is not None else httpx.USE_CLIENT_DEFAULT,
+        ) as response:
+            if response.status_code != 200:
+                if response.status_code == 404:
+                    raise OllamaEndpointNotFoundError("Ollama call failed with status code 404.")
+                detail = (await response.aread()).decode("utf-8", "replace")
+                raise ValueError(
+                    f"Ollama call failed with status code {response.status_code}. Details: {detail}"
+                )
+            async for line in response.aiter_lines():
+                yield line
+
 
 @lru_cache(maxsize=1)
 def get_llm() -> BaseChatModel:
     """Return a cached ChatOllama instance configured from settings."""
 
     settings = get_settings()
-    return ChatOllama(base_url=settings.ollama_base_url, model=settings.ollama_model)
+    return PooledChatOllama(base_url=settings.ollama_base_url, model=settings.ollama_model)
@@ -1,15 +1,40 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from route_planner_mcp.pathfinding import shutdown_profile_pool
 
 from agent_app.api.routes import router as planner_router
 from agent_app.config import get_settings
+from agent_app.graph import RoutePlannerGraph
+from agent_app.llm import close_ollama_client
+from agent_app.progress import close_progress_broker
+from agent_app.workers import shutdown_terrain_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    app.state.graph = RoutePlannerGraph()
+    try:
+        yield
+    finally:
+        app.state.graph = None
+        shutdown_terrain_executor()
+        shutdown_profile_pool()
+        await close_progress_broker()
+        await close_ollama_client()
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
-    app = FastAPI(title="Route Planner Agent", debug=settings.debug)
+    app = FastAPI(
+        title="Route Planner Agent",
+        debug=settings.debug,
+        lifespan=lifespan,
+    )
     app.add_middleware(
         CORSMiddleware,
         allow_origins=settings.cors_allow_origins,
@@ -3,12 +3,14 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 TerrainBundleType = Literal["dem", "landcover", "roads", "obstacles"]
 
 
 class TerrainBundleCreate(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     name: str = Field(..., description="Human readable name for the terrain bundle")
     description: str | None = Field(default=None, description="Optional description metadata")
     bundle_path: Path = Field(..., description="Path to the uploaded archive on disk")
@@ -16,6 +18,8 @@ class TerrainBundleCreate(BaseModel):
 
 
 class TerrainBundleSummary(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str = Field(..., description="Unique identifier for the terrain bundle")
     name: str = Field(..., description="Human readable name for the terrain bundle")
     description: str | None = Field(default=None, description="Optional description metadata")
@@ -3,13 +3,15 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any, Dict, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 RoutePreference = Literal["balanced", "trail_pref", "low_exposure"]
 SelectionPolicy = Literal["prefer_low_risk", "cost_only"]
 
 
 class PlanCreateRequest(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     terrain_id: str = Field(..., description="Identifier of the terrain bundle to use")
     start_lat: float
     start_lon: float
@@ -23,6 +25,8 @@ class PlanCreateRequest(BaseModel):
 
 
 class PlanRunStatus(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     run_id: str
     status: Literal["queued", "running", "awaiting_approval", "completed", "failed"]
     created_at: datetime
@@ -31,6 +35,8 @@ class PlanRunStatus(BaseModel):
 
 
 class PlanResult(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     run_id: str
     approved_route_id: Optional[str]
     artifact_base: Optional[str]
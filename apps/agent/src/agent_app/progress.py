@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import AsyncIterator, Optional
+
+import orjson
+
+from agent_app.config import get_settings
+
+# Progress entries expire this long after their last update
+PROGRESS_TTL_SECONDS = 3600
+
+
+@dataclass
+class UploadProgress:
+    """Latest progress snapshot for an upload plus the event SSE clients wait on."""
+
+    state: dict
+    loop: asyncio.AbstractEventLoop
+    event: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def _notify(self) -> None:
+        # Swap in a fresh event so every waiting client wakes exactly once per change
+        event, self.event = self.event, asyncio.Event()
+        event.set()
+
+    def update(self, state: dict) -> None:
+        """Replace the snapshot; safe to call from the background worker thread."""
+        self.state = state
+        self.loop.call_soon_threadsafe(self._notify)
+
+
+class UploadProgressStore:
+    """Bounded, TTL-expiring map of upload id to progress, safe across threads."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, UploadProgress]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        # Entries are kept in insertion order, so the oldest sit at the front
+        while self._entries:
+            upload_id, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.maxsize:
+                break
+            del self._entries[upload_id]
+
+    def __setitem__(self, upload_id: str, entry: UploadProgress) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries.pop(upload_id, None)
+            self._entries[upload_id] = (now + self.ttl, entry)
+            self._expire(now)
+
+    def get(self, upload_id: str) -> Optional[UploadProgress]:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            item = self._entries.get(upload_id)
+        return item[1] if item else None
+
+    def pop(self, upload_id: str) -> None:
+        with self._lock:
+            self._entries.pop(upload_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class _LocalSubscription:
+    def __init__(self, entry: Optional[UploadProgress]) -> None:
+        self._entry = entry
+        self._event = entry.event if entry is not None else None
+
+    async def next(self, timeout: float) -> Optional[dict]:
+        """Wait for the next snapshot; None if nothing changed within timeout."""
+        if self._entry is None:
+            await asyncio.sleep(timeout)
+            return None
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        # Read the snapshot and the event together so no update slips in between
+        self._event = self._entry.event
+        return self._entry.state
+
+
+class InMemoryProgressBroker:
+    """Keeps upload progress in this process; used when no Redis URL is configured."""
+
+    def __init__(self) -> None:
+        self.store = UploadProgressStore(ttl=PROGRESS_TTL_SECONDS)
+
+    async def set(self, upload_id: str, state: dict) -> None:
+        entry = self.store.get(upload_id)
+        if entry is None:
+            entry = UploadProgress(state=state, loop=asyncio.get_running_loop())
+        else:
+            entry.update(state)
+        self.store[upload_id] = entry
+
+    async def get(self, upload_id: str) -> Optional[dict]:
+        entry = self.store.get(upload_id)
+        return entry.state if entry is not None else None
+
+    async def expire(self, upload_id: str, delay: float) -> None:
+        asyncio.get_running_loop().call_later(delay, self.store.pop, upload_id)
+
+    @asynccontextmanager
+    async def subscribe(self, upload_id: str) -> AsyncIterator[_LocalSubscription]:
+        yield _LocalSubscription(self.store.get(upload_id))
+
+    async def close(self) -> None:
+        return None
+
+
+class _RedisSubscription:
+    def __init__(self, pubsub) -> None:
+        self._pubsub = pubsub
+
+    async def next(self, timeout: float) -> Optional[dict]:
+        """Wait for the next published snapshot; None if nothing arrived within timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        # get_message returns early with None for the subscribe confirmation
+        while (remaining := deadline - loop.time()) > 0:
+            message = await self._pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=remaining
+            )
+            if message is not None:
+                return orjson.loads(message["data"])
+        return None
+
+
+class RedisProgressBroker:
+    """Shares upload progress between uvicorn workers through Redis keys and pub/sub."""
+
+    def __init__(self, url: str) -> None:
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as exc:
+            raise RuntimeError(
+                "ROUTE_AGENT_REDIS_URL is set but redis is not installed; "
+                "install route-planner-agent[redis]"
+            ) from exc
+        self.client = aioredis.Redis.from_url(url)
+
+    @staticmethod
+    def _key(upload_id: str) -> str:
+        return f"upload:{upload_id}"
+
+    async def set(self, upload_id: str, state: dict) -> None:
+        key = self._key(upload_id)
+        payload = orjson.dumps(state)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(key, payload, ex=PROGRESS_TTL_SECONDS)
+            pipe.publish(key, payload)
+            await pipe.execute()
+
+    async def get(self, upload_id: str) -> Optional[dict]:
+        payload = await self.client.get(self._key(upload_id))
+        return orjson.loads(payload) if payload is not None else None
+
+    async def expire(self, upload_id: str, delay: float) -> None:
+        await self.client.expire(self._key(upload_id), int(delay))
+
+    @asynccontextmanager
+    async def subscribe(self, upload_id: str) -> AsyncIterator[_RedisSubscription]:
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self._key(upload_id))
+        try:
+            yield _RedisSubscription(pubsub)
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+@lru_cache(maxsize=1)
+def get_progress_broker() -> InMemoryProgressBroker | RedisProgressBroker:
+    """Return the upload progress broker selected by settings."""
+
+    settings = get_settings()
+    if settings.redis_url:
+        return RedisProgressBroker(settings.redis_url)
+    return InMemoryProgressBroker()
+
+
+async def close_progress_broker() -> None:
+    if get_progress_broker.cache_info().currsize:
+        await get_progress_broker().close()
+        get_progress_broker.cache_clear()
@@ -1,16 +1,57 @@
 from __future__ import annotations
 
+import os
 import shutil
 import tarfile
 import zipfile
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel
+from route_planner_mcp.data_loader import GEOJSON_SEQ_SUFFIX, bundle_vector_path
 
 from agent_app.config import get_settings
 from agent_app.tools.osm_converter import OSMConverter
 
+# Copy buffer used when streaming archive members to disk
+EXTRACT_CHUNK_SIZE = 256 * 1024
+
+REQUIRED_GRID_FILES = frozenset({"dem.json", "landcover.json"})
+# Vector layers may ship as a FeatureCollection (.geojson) or a GeoJSON text sequence (.geojsons)
+VECTOR_LAYERS = ("roads", "obstacles")
+
+ArchiveKind = Literal["osm", "zip", "tar", "invalid"]
+
+# Enough leading bytes to reach the POSIX "ustar" marker of an uncompressed TAR
+ARCHIVE_HEADER_BYTES = 265
+ZIP_MAGIC = (b"PK\x03\x04", b"PK\x05\x06")
+COMPRESSED_TAR_MAGIC = (b"\x1f\x8b", b"BZh", b"\xfd7zXZ\x00")
+
+
+def detect_archive(header: bytes) -> ArchiveKind:
+    """Classify an upload from its leading bytes."""
+    if header.startswith(ZIP_MAGIC):
+        return "zip"
+    if header.startswith(COMPRESSED_TAR_MAGIC) or header[257:262] == b"ustar":
+        return "tar"
+    # A PBF opens with a 4-byte length followed by a BlobHeader typed "OSMHeader"
+    if b"OSMHeader" in header[4:24]:
+        return "osm"
+    return "invalid"
+
+
+def _has_bundle_files(names: set[str]) -> bool:
+    """Check a bundle directory listing for the grids and one file per vector layer."""
+    return REQUIRED_GRID_FILES <= names and all(
+        f"{stem}.geojson" in names or f"{stem}{GEOJSON_SEQ_SUFFIX}" in names
+        for stem in VECTOR_LAYERS
+    )
+
+
+def _detect_archive(path: Path) -> ArchiveKind:
+    with open(path, "rb") as f:
+        return detect_archive(f.read(ARCHIVE_HEADER_BYTES))
+
 
 class TerrainContext(BaseModel):
     terrain_id: str
@@ -25,28 +66,47 @@ class LocalTerrainTool:
 
     def __init__(self) -> None:
         self.settings = get_settings()
+        # (data_root mtime_ns, bundles) from the last directory scan
+        self._bundle_cache: Optional[tuple[int, list[dict[str, str]]]] = None
+        # terrain_id -> TerrainContext for bundles that loaded successfully
+        self._contexts: dict[str, TerrainContext] = {}
 
     def load(self, terrain_id: str) -> TerrainContext:
+        context = self._contexts.get(terrain_id)
+        if context is not None:
+            paths = (
+                context.dem_path,
+                context.landcover_path,
+                context.roads_path,
+                context.obstacles_path,
+            )
+            # Re-check existence so deleted bundles still fail, but skip rebuilding the paths
+            if all(path.exists() for path in paths):
+                return context
+            del self._contexts[terrain_id]
+
         bundle_dir = self.settings.data_root / terrain_id
         if not bundle_dir.exists():
             raise FileNotFoundError(f"Terrain bundle '{terrain_id}' not found at {bundle_dir}")
 
         dem = bundle_dir / "dem.json"
         landcover = bundle_dir / "landcover.json"
-        roads = bundle_dir / "roads.geojson"
-        obstacles = bundle_dir / "obstacles.geojson"
+        roads = bundle_vector_path(bundle_dir, "roads")
+        obstacles = bundle_vector_path(bundle_dir, "obstacles")
 
         for path in (dem, landcover, roads, obstacles):
             if not path.exists():
                 raise FileNotFoundError(f"Terrain bundle missing required file: {path}")
 
-        return TerrainContext(
+        context = TerrainContext(
             terrain_id=terrain_id,
             dem_path=dem,
             landcover_path=landcover,
             roads_path=roads,
             obstacles_path=obstacles,
         )
+        self._contexts[terrain_id] = context
+        return context
 
     def register(self, name: str, archive_path: Path, *, auto_activate: bool = True) -> TerrainContext:
         """Extract terrain bundle archive and validate contents."""
@@ -54,30 +114,37 @@ class LocalTerrainTool:
         logger = logging.getLogger("uvicorn")
         
         target_dir = self.settings.data_root / name
-        target_dir.mkdir(parents=True, exist_ok=True)
-        logger.info(f"📁 Target directory: {target_dir}")
         
         # Extract archive based on file type
         if not archive_path.exists():
             raise FileNotFoundError(f"Archive file not found: {archive_path}")
+        if archive_path.resolve().is_relative_to(target_dir.resolve()):
+            raise ValueError(f"Archive must not be inside the bundle directory: {archive_path}")
+        
+        # Start from an empty directory so files from an earlier upload of this name, such as
+        # a roads.geojsons that bundle_vector_path would prefer, cannot shadow the new ones
+        if target_dir.exists():
+            shutil.rmtree(target_dir)
+        target_dir.mkdir(parents=True)
+        logger.info(f"📁 Target directory: {target_dir}")
         
         try:
-            # Check if it's an OSM PBF file
-            if OSMConverter.is_osm_pbf(archive_path):
-                logger.info(f"🗺️  Detected OSM PBF file, converting...")
-                self._process_osm_pbf(archive_path, target_dir)
-            elif archive_path.suffix == '.zip':
-                logger.info(f"📦 Extracting ZIP archive...")
-                with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-                    zip_ref.extractall(target_dir)
-                logger.info(f"✅ ZIP extracted")
-            elif archive_path.suffix in ['.tar', '.gz', '.tgz']:
-                logger.info(f"📦 Extracting TAR archive...")
-                with tarfile.open(archive_path, 'r:*') as tar_ref:
-                    tar_ref.extractall(target_dir)
-                logger.info(f"✅ TAR extracted")
-            else:
-                raise ValueError(f"Unsupported archive format: {archive_path.suffix}")
+            match _detect_archive(archive_path):
+                case "osm":
+                    logger.info(f"🗺️  Detected OSM PBF file, converting...")
+                    self._process_osm_pbf(archive_path, target_dir)
+                case "zip":
+                    logger.info(f"📦 Extracting ZIP archive...")
+                    with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+                        self._extract_zip(zip_ref, target_dir)
+                    logger.info(f"✅ ZIP extracted")
+                case "tar":
+                    logger.info(f"📦 Extracting TAR archive...")
+                    with tarfile.open(archive_path, 'r:*', bufsize=EXTRACT_CHUNK_SIZE) as tar_ref:
+                        self._extract_tar(tar_ref, target_dir)
+                    logger.info(f"✅ TAR extracted")
+                case _:
+                    raise ValueError(f"Unsupported archive format: {archive_path.name}")
         except Exception as e:
             logger.error(f"❌ Extraction failed: {e}")
             # Clean up on failure
@@ -88,8 +155,8 @@ class LocalTerrainTool:
         # Validate required files exist
         dem = target_dir / "dem.json"
         landcover = target_dir / "landcover.json"
-        roads = target_dir / "roads.geojson"
-        obstacles = target_dir / "obstacles.geojson"
+        roads = bundle_vector_path(target_dir, "roads")
+        obstacles = bundle_vector_path(target_dir, "obstacles")
         
         missing_files = []
         for path in (dem, landcover, roads, obstacles):
@@ -101,6 +168,7 @@ class LocalTerrainTool:
             shutil.rmtree(target_dir)
             raise ValueError(f"Archive is missing required files: {', '.join(missing_files)}")
         
+        self.invalidate_bundle_cache()
         return TerrainContext(
             terrain_id=name,
             dem_path=dem,
@@ -109,24 +177,73 @@ class LocalTerrainTool:
             obstacles_path=obstacles,
         )
 
+    @staticmethod
+    def _safe_member_path(target_dir: Path, member_name: str) -> Path:
+        """Resolve an archive member inside target_dir, rejecting path traversal."""
+        root = target_dir.resolve()
+        destination = (root / member_name).resolve()
+        if destination != root and root not in destination.parents:
+            raise ValueError(f"Archive member escapes target directory: {member_name}")
+        return destination
+
+    def _extract_zip(self, zip_ref: zipfile.ZipFile, target_dir: Path) -> None:
+        """Stream ZIP members to disk one at a time with a fixed copy buffer."""
+        for info in zip_ref.infolist():
+            destination = self._safe_member_path(target_dir, info.filename)
+            if info.is_dir():
+                destination.mkdir(parents=True, exist_ok=True)
+                continue
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            with zip_ref.open(info) as src, open(destination, "wb") as dst:
+                shutil.copyfileobj(src, dst, length=EXTRACT_CHUNK_SIZE)
+
+    def _extract_tar(self, tar_ref: tarfile.TarFile, target_dir: Path) -> None:
+        """Stream regular files and directories from a TAR archive."""
+        for member in tar_ref:
+            destination = self._safe_member_path(target_dir, member.name)
+            if member.isdir():
+                destination.mkdir(parents=True, exist_ok=True)
+                continue
+            if not member.isfile():
+                continue  # Skip links and device files
+            src = tar_ref.extractfile(member)
+            if src is None:
+                continue
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            with src, open(destination, "wb") as dst:
+                shutil.copyfileobj(src, dst, length=EXTRACT_CHUNK_SIZE)
+
     def list_bundles(self) -> list[dict[str, str]]:
         """List all available terrain bundles."""
+        data_root = self.settings.data_root
+        try:
+            mtime = data_root.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if self._bundle_cache is not None and self._bundle_cache[0] == mtime:
+            return list(self._bundle_cache[1])
+
         bundles = []
-        if not self.settings.data_root.exists():
-            return bundles
-        
-        for bundle_dir in self.settings.data_root.iterdir():
+        for bundle_dir in data_root.iterdir():
             if bundle_dir.is_dir():
-                # Check if it has the required files
-                required_files = ["dem.json", "landcover.json", "roads.geojson", "obstacles.geojson"]
-                if all((bundle_dir / f).exists() for f in required_files):
+                # One readdir per bundle instead of a stat per required file
+                names = {entry.name for entry in bundle_dir.iterdir()}
+                if _has_bundle_files(names):
                     bundles.append({
                         "id": bundle_dir.name,
                         "name": bundle_dir.name.replace("_", " ").title(),
                         "description": f"Terrain bundle: {bundle_dir.name}"
                     })
         
-        return bundles
+        self._bundle_cache = (mtime, bundles)
+        return list(bundles)
+
+    def invalidate_bundle_cache(self) -> None:
+        """Drop the cached bundle listing in this and every other process."""
+        self._bundle_cache = None
+        # Registration may run in a worker process; bumping the data_root mtime
+        # invalidates the listing cached by the API process as well.
+        os.utime(self.settings.data_root)
 
     def _process_osm_pbf(self, osm_pbf_path: Path, target_dir: Path) -> None:
         """
@@ -136,16 +253,13 @@ class LocalTerrainTool:
             osm_pbf_path: Path to the OSM PBF file
             target_dir: Directory to store the converted files
         """
-        roads_path = target_dir / "roads.geojson"
-        obstacles_path = target_dir / "obstacles.geojson"
+        roads_path = target_dir / f"roads{GEOJSON_SEQ_SUFFIX}"
+        obstacles_path = target_dir / f"obstacles{GEOJSON_SEQ_SUFFIX}"
         dem_path = target_dir / "dem.json"
         landcover_path = target_dir / "landcover.json"
         
-        # Convert roads from OSM
-        OSMConverter.convert_to_roads(osm_pbf_path, roads_path)
-        
-        # Convert obstacles from OSM (or create empty)
-        OSMConverter.convert_to_obstacles(osm_pbf_path, obstacles_path)
+        # Convert roads and obstacles from OSM in one pass (obstacles fall back to empty)
+        OSMConverter.convert_to_terrain(osm_pbf_path, roads_path, obstacles_path)
         
         # Create placeholder DEM and land cover
         # Users will need to upload these separately or we can add them later
@@ -1,123 +1,193 @@
 """Convert OSM PBF files to required terrain data format."""
 from __future__ import annotations
 
-import json
+import importlib.util
+from contextlib import ExitStack
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, BinaryIO, Dict, List, Optional
 
-try:
-    import osmium
-    from shapely.geometry import mapping, LineString
-    OSMIUM_AVAILABLE = True
-except ImportError:
-    OSMIUM_AVAILABLE = False
+import numpy as np
+import orjson
 
+# Write buffer for streamed GeoJSON output
+OUTPUT_BUFFER_SIZE = 1 << 20
+FEATURE_COLLECTION_PREFIX = b'{"type":"FeatureCollection","features":['
+FEATURE_COLLECTION_SUFFIX = b"]}"
+# Placeholder DEM and land cover cover this many cells when no raster data is supplied
+PLACEHOLDER_GRID_SHAPE = (10, 10)
+DEFAULT_PLACEHOLDER_BOUNDS = {"minx": -117.0, "miny": 34.0, "maxx": -116.99, "maxy": 34.01}
+# Encoded features buffered before they are written to the output in one call
+FEATURE_BATCH_SIZE = 4096
 
-class RoadHandler(osmium.SimpleHandler):
-    """Extract roads from OSM data."""
-    
-    def __init__(self):
-        super().__init__()
-        self.roads = []
-    
-    def way(self, w):
-        """Process ways (roads)."""
-        if 'highway' in w.tags:
-            try:
-                coords = [(node.lon, node.lat) for node in w.nodes]
-                if len(coords) >= 2:
-                    self.roads.append({
-                        "type": "Feature",
-                        "geometry": mapping(LineString(coords)),
-                        "properties": {
-                            "id": w.id,
-                            "highway": w.tags.get('highway', ''),
-                            "name": w.tags.get('name', '')
-                        }
-                    })
-            except osmium.InvalidLocationError:
-                pass  # Skip ways with invalid coordinates
+# Checked without importing so the agent starts without loading libosmium
+OSMIUM_AVAILABLE = importlib.util.find_spec("osmium") is not None
+# Handler classes live in osm_handlers, which imports osmium on first use
+_LAZY_HANDLERS = frozenset({"RoadHandler", "ObstacleHandler", "CombinedHandler"})
 
 
-class ObstacleHandler(osmium.SimpleHandler):
-    """Extract obstacles (buildings, water) from OSM data."""
-    
-    def __init__(self):
-        super().__init__()
-        self.obstacles = []
-    
-    def area(self, a):
-        """Process areas (buildings, water bodies)."""
-        is_building = 'building' in a.tags
-        is_water = a.tags.get('natural') == 'water' or a.tags.get('water') is not None
-        is_military = a.tags.get('landuse') == 'military'
-        
-        if is_building or is_water or is_military:
-            try:
-                outer_coords = []
-                for ring in a.outer_rings():
-                    coords = [(node.lon, node.lat) for node in ring]
-                    if len(coords) >= 3:
-                        outer_coords.append(coords)
-                
-                if outer_coords:
-                    from shapely.geometry import Polygon
-                    self.obstacles.append({
-                        "type": "Feature",
-                        "geometry": mapping(Polygon(outer_coords[0])),
-                        "properties": {
-                            "id": a.id,
-                            "type": "building" if is_building else ("water" if is_water else "military")
-                        }
-                    })
-            except (osmium.InvalidLocationError, ValueError):
-                pass  # Skip invalid geometries
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_HANDLERS:
+        from agent_app.tools import osm_handlers
+
+        return getattr(osm_handlers, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class FeatureWriter:
+    """Streams GeoJSON features into an open FeatureCollection, writing them in batches."""
+
+    prefix = FEATURE_COLLECTION_PREFIX
+    suffix = FEATURE_COLLECTION_SUFFIX
+
+    def __init__(self, fp: BinaryIO):
+        self._fp = fp
+        self.count = 0
+        self._features: List[bytes] = []
+        fp.write(self.prefix)
+
+    def add(self, geometry: bytes, properties: Dict[str, Any]) -> None:
+        """Queue a feature from its already-encoded GeoJSON geometry."""
+        self._features.append(
+            b'{"type":"Feature","geometry":' + geometry
+            + b',"properties":' + orjson.dumps(properties) + b"}"
+        )
+        if len(self._features) >= FEATURE_BATCH_SIZE:
+            self.flush()
+
+    def _write_features(self, features: List[bytes]) -> None:
+        if self.count:
+            self._fp.write(b",")
+        self._fp.write(b",".join(features))
+
+    def flush(self) -> None:
+        """Write every buffered feature."""
+        if not self._features:
+            return
+        self._write_features(self._features)
+        self.count += len(self._features)
+        self._features.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self._fp.write(self.suffix)
+
+
+class FeatureSeqWriter(FeatureWriter):
+    """Writes GeoJSON text sequences (RFC 8142) so readers can consume one feature at a time."""
+
+    prefix = b""
+    suffix = b""
+
+    def _write_features(self, features: List[bytes]) -> None:
+        self._fp.write(b"".join(b"\x1e" + feature + b"\n" for feature in features))
 
 
 class OSMConverter:
     """Convert OSM PBF files to GeoJSON format for terrain bundles."""
 
     @staticmethod
-    def is_osm_pbf(file_path: Path) -> bool:
-        """Check if a file is an OSM PBF file."""
-        return file_path.suffix.lower() in ['.pbf', '.osm.pbf'] or 'osm.pbf' in file_path.name.lower()
-
-    @staticmethod
-    def convert_to_roads(osm_pbf_path: Path, output_path: Path) -> None:
+    def convert(
+        osm_pbf_path: Path,
+        roads_path: Optional[Path] = None,
+        obstacles_path: Optional[Path] = None,
+        sequence: bool = False,
+    ) -> None:
         """
-        Convert OSM PBF file to roads GeoJSON using pyosmium.
+        Extract roads and/or obstacles GeoJSON from an OSM PBF file in a single pass.
+        
+        Both outputs share one read of the PBF and one node location index, instead
+        of paying for them again in separate convert_to_roads/convert_to_obstacles calls.
         
         Args:
             osm_pbf_path: Path to the OSM PBF file
-            output_path: Path where the roads.geojson will be saved
+            roads_path: Where roads.geojson will be saved, if wanted
+            obstacles_path: Where obstacles.geojson will be saved, if wanted
+            sequence: Write GeoJSON text sequences (.geojsons) instead of FeatureCollections
         """
         if not OSMIUM_AVAILABLE:
             raise RuntimeError(
-                "osmium is not installed. Install dependencies with: pip install osmium shapely"
+                "osmium is not installed. Install dependencies with: pip install osmium"
             )
         
         import logging
+        import osmium.filter
+        from agent_app.tools.osm_handlers import CombinedHandler, ObstacleHandler, RoadHandler
         logger = logging.getLogger("uvicorn")
         
-        logger.info(f"🛣️  Converting roads from {osm_pbf_path.name}...")
-        handler = RoadHandler()
-        handler.apply_file(str(osm_pbf_path), locations=True)
-        logger.info(f"   Found {len(handler.roads)} road features")
+        logger.info(f"🗺️  Converting {osm_pbf_path.name}...")
+        with ExitStack() as stack:
+            def writer(path: Path) -> FeatureWriter:
+                fp = stack.enter_context(open(path, 'wb', buffering=OUTPUT_BUFFER_SIZE))
+                return (FeatureSeqWriter if sequence else FeatureWriter)(fp)
+
+            roads = writer(roads_path) if roads_path else None
+            obstacles = writer(obstacles_path) if obstacles_path else None
+            if roads and obstacles:
+                handler = CombinedHandler(roads, obstacles)
+            elif roads:
+                handler = RoadHandler(roads)
+            elif obstacles:
+                handler = ObstacleHandler(obstacles)
+            else:
+                return
+            # Untagged nodes still reach the location index; only the callbacks are filtered
+            handler.apply_file(
+                str(osm_pbf_path),
+                locations=True,
+                filters=[osmium.filter.KeyFilter(*handler.filter_keys)],
+            )
+            for features in (roads, obstacles):
+                if features is not None:
+                    features.close()
         
-        geojson = {
-            "type": "FeatureCollection",
-            "features": handler.roads
-        }
+        if roads:
+            logger.info(f"   Found {roads.count} road features")
+            logger.info(f"✅ Saved roads to {roads_path.name}")
+        if obstacles:
+            logger.info(f"   Found {obstacles.count} obstacle features")
+            logger.info(f"✅ Saved obstacles to {obstacles_path.name}")
+
+    @staticmethod
+    def convert_to_terrain(osm_pbf_path: Path, roads_path: Path, obstacles_path: Path) -> None:
+        """
+        Convert roads and obstacles together, keeping roads if obstacle extraction fails.
+        
+        Both layers are written as GeoJSON text sequences (roads.geojsons, obstacles.geojsons),
+        which the route planner reads one feature at a time instead of parsing a whole
+        FeatureCollection first.
+        """
+        import logging
+        logger = logging.getLogger("uvicorn")
+        
+        try:
+            OSMConverter.convert(osm_pbf_path, roads_path, obstacles_path, sequence=True)
+        except Exception as e:
+            logger.warning(f"⚠️  Combined conversion failed: {e}, retrying roads without obstacles")
+            OSMConverter.convert(osm_pbf_path, roads_path=roads_path, sequence=True)
+            # An empty GeoJSON text sequence is an empty file
+            obstacles_path.write_bytes(b"")
+
+    @staticmethod
+    def convert_to_roads(osm_pbf_path: Path, output_path: Path) -> None:
+        """
+        Convert OSM PBF file to roads GeoJSON using pyosmium.
         
-        with open(output_path, 'w') as f:
-            json.dump(geojson, f, indent=2)
-        logger.info(f"✅ Saved roads to {output_path.name}")
+        Prefer convert() when obstacles are needed too; it reads the PBF only once.
+        
+        Args:
+            osm_pbf_path: Path to the OSM PBF file
+            output_path: Path where the roads.geojson will be saved
+        """
+        OSMConverter.convert(osm_pbf_path, roads_path=output_path)
 
     @staticmethod
     def convert_to_obstacles(osm_pbf_path: Path, output_path: Path) -> None:
         """
         Convert OSM PBF file to obstacles GeoJSON using pyosmium.
         
+        Prefer convert() when roads are needed too; it reads the PBF only once.
+        
         Args:
             osm_pbf_path: Path to the OSM PBF file
             output_path: Path where the obstacles.geojson will be saved
@@ -130,19 +200,7 @@ class OSMConverter:
         logger = logging.getLogger("uvicorn")
         
         try:
-            logger.info(f"🏗️  Converting obstacles from {osm_pbf_path.name}...")
-            handler = ObstacleHandler()
-            handler.apply_file(str(osm_pbf_path), locations=True)
-            logger.info(f"   Found {len(handler.obstacles)} obstacle features")
-            
-            geojson = {
-                "type": "FeatureCollection",
-                "features": handler.obstacles
-            }
-            
-            with open(output_path, 'w') as f:
-                json.dump(geojson, f, indent=2)
-            logger.info(f"✅ Saved obstacles to {output_path.name}")
+            OSMConverter.convert(osm_pbf_path, obstacles_path=output_path)
         except Exception as e:
             logger.warning(f"⚠️  Failed to extract obstacles: {e}, creating empty file")
             # If extraction fails, create empty file
@@ -155,8 +213,23 @@ class OSMConverter:
             "type": "FeatureCollection",
             "features": []
         }
-        with open(output_path, 'w') as f:
-            json.dump(geojson, f)
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(geojson))
+
+    @staticmethod
+    def _placeholder_metadata(bounds: dict | None) -> dict:
+        """Grid metadata shared by the placeholder DEM and land cover."""
+        if bounds is None:
+            bounds = DEFAULT_PLACEHOLDER_BOUNDS
+        return {
+            "origin": {
+                "lat": bounds.get("miny", 34.0),
+                "lon": bounds.get("minx", -117.0)
+            },
+            "cell_size_m": 100,
+            "ttl_hours": 720,
+            "last_updated": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        }
 
     @staticmethod
     def create_placeholder_dem(output_path: Path, bounds: dict = None) -> None:
@@ -167,34 +240,16 @@ class OSMConverter:
             output_path: Path where dem.json will be saved
             bounds: Optional bounds dict with minx, miny, maxx, maxy
         """
-        from datetime import datetime, timezone
-        
-        if bounds is None:
-            bounds = {
-                "minx": -117.0,
-                "miny": 34.0,
-                "maxx": -116.99,
-                "maxy": 34.01
-            }
-        
-        # Create a simple 10x10 grid with flat elevation (100m)
-        grid = [[100] * 10 for _ in range(10)]
+        # Flat 100 m elevation; orjson serializes the int16 array without boxing each cell
+        grid = np.full(PLACEHOLDER_GRID_SHAPE, 100, dtype=np.int16)
         
         dem_data = {
-            "metadata": {
-                "origin": {
-                    "lat": bounds.get("miny", 34.0),
-                    "lon": bounds.get("minx", -117.0)
-                },
-                "cell_size_m": 100,
-                "ttl_hours": 720,
-                "last_updated": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-            },
+            "metadata": OSMConverter._placeholder_metadata(bounds),
             "grid": grid
         }
         
-        with open(output_path, 'w') as f:
-            json.dump(dem_data, f, indent=2)
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(dem_data, option=orjson.OPT_SERIALIZE_NUMPY))
 
     @staticmethod
     def create_placeholder_landcover(output_path: Path, bounds: dict = None) -> None:
@@ -205,29 +260,13 @@ class OSMConverter:
             output_path: Path where landcover.json will be saved
             bounds: Optional bounds dict with minx, miny, maxx, maxy
         """
-        from datetime import datetime, timezone
-        
-        if bounds is None:
-            bounds = {
-                "minx": -117.0,
-                "miny": 34.0,
-                "maxx": -116.99,
-                "maxy": 34.01
-            }
-        
-        # Create a simple 10x10 grid with "open" terrain (most neutral)
-        grid = [["open"] * 10 for _ in range(10)]
+        rows, cols = PLACEHOLDER_GRID_SHAPE
+        # "open" terrain (most neutral) everywhere; every row can share one list
+        # because the grid is serialized immediately and never mutated
+        grid = [["open"] * cols] * rows
         
         landcover_data = {
-            "metadata": {
-                "origin": {
-                    "lat": bounds.get("miny", 34.0),
-                    "lon": bounds.get("minx", -117.0)
-                },
-                "cell_size_m": 100,
-                "ttl_hours": 720,
-                "last_updated": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-            },
+            "metadata": OSMConverter._placeholder_metadata(bounds),
             "classes": {
                 "trail": {
                     "cost_factor": 0.8,
@@ -258,5 +297,5 @@ class OSMConverter:
             "grid": grid
         }
         
-        with open(output_path, 'w') as f:
-            json.dump(landcover_data, f, indent=2)
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(landcover_data))
@@ -0,0 +1,103 @@
+"""pyosmium handlers that stream roads and obstacles into GeoJSON feature writers."""
+from __future__ import annotations
+
+from array import array
+from typing import TYPE_CHECKING
+
+import numpy as np
+import orjson
+import osmium
+import osmium.geom
+
+if TYPE_CHECKING:
+    from agent_app.tools.osm_converter import FeatureWriter
+
+
+def _lonlat_array(nodes) -> np.ndarray:
+    """Copy node locations into an (N, 2) float64 array without a tuple per node."""
+    flat = array('d')
+    append = flat.append
+    for node in nodes:
+        append(node.lon)
+        append(node.lat)
+    return np.frombuffer(flat, dtype=np.float64).reshape(-1, 2)
+
+
+class RoadHandler(osmium.SimpleHandler):
+    """Extract roads from OSM data."""
+    
+    # Objects without any of these keys are dropped in C++ before reaching the callbacks
+    filter_keys = ('highway',)
+    
+    def __init__(self, roads: FeatureWriter):
+        super().__init__()
+        self.roads = roads
+        self._geojson = osmium.geom.GeoJSONFactory()
+    
+    def way(self, w):
+        """Process ways (roads)."""
+        if 'highway' in w.tags and len(w.nodes) >= 2:
+            try:
+                # Encoded on the C++ side; keep repeated nodes so output matches the way exactly
+                geometry = self._geojson.create_linestring(w.nodes, osmium.geom.use_nodes.ALL)
+            except osmium.InvalidLocationError:
+                return  # Skip ways with invalid coordinates
+            self.roads.add(geometry.encode(), {
+                "id": w.id,
+                "highway": w.tags.get('highway', ''),
+                "name": w.tags.get('name', '')
+            })
+
+
+class ObstacleHandler(osmium.SimpleHandler):
+    """Extract obstacles (buildings, water) from OSM data."""
+    
+    filter_keys = ('building', 'natural', 'water', 'landuse')
+    
+    def __init__(self, obstacles: FeatureWriter):
+        super().__init__()
+        self.obstacles = obstacles
+    
+    def area(self, a):
+        """Process areas (buildings, water bodies)."""
+        # Each lookup is a C++ scan of the tag list, so stop at the first match
+        tags = a.tags
+        if 'building' in tags:
+            obstacle_type = "building"
+        elif tags.get('natural') == 'water' or 'water' in tags:
+            obstacle_type = "water"
+        elif tags.get('landuse') == 'military':
+            obstacle_type = "military"
+        else:
+            return
+        try:
+            # Only the first usable outer ring is exported, so convert just that one
+            ring = next((ring for ring in a.outer_rings() if len(ring) >= 3), None)
+            if ring is None:
+                return
+            coords = _lonlat_array(ring)
+        except osmium.InvalidLocationError:
+            return  # Skip invalid geometries
+        if not np.array_equal(coords[0], coords[-1]):
+            coords = np.vstack((coords, coords[:1]))
+        if len(coords) < 4:
+            return  # Degenerate ring that cannot form a polygon
+        geometry = orjson.dumps(
+            {"type": "Polygon", "coordinates": [coords]}, option=orjson.OPT_SERIALIZE_NUMPY
+        )
+        self.obstacles.add(geometry, {
+            "id": a.id,
+            "type": obstacle_type
+        })
+
+
+class CombinedHandler(RoadHandler, ObstacleHandler):
+    """Extract roads and obstacles in one pass, sharing a single node location index."""
+
+    filter_keys = RoadHandler.filter_keys + ObstacleHandler.filter_keys
+
+    def __init__(self, roads: FeatureWriter, obstacles: FeatureWriter):
+        osmium.SimpleHandler.__init__(self)
+        self.roads = roads
+        self.obstacles = obstacles
+        self._geojson = osmium.geom.GeoJSONFactory()
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from typing import Any, Dict, Optional
 
-from route_planner_mcp.server import ENGINE
+from route_planner_mcp.data_loader import GEOJSON_SEQ_SUFFIX
+from route_planner_mcp.server import RoutePlannerEngine, get_engine
 
 from agent_app.tools.local_terrain import TerrainContext
 
@@ -11,7 +12,33 @@ class RoutePlannerMCPTool:
     """Thin wrapper around the Route Planner MCP engine for LangGraph tool calls."""
 
     def __init__(self) -> None:
-        self.engine = ENGINE
+        # (bundle directory, newest file mtime_ns) of the terrain currently loaded in the engine
+        self._loaded_terrain: Optional[tuple[str, int]] = None
+
+    @property
+    def engine(self) -> RoutePlannerEngine:
+        return get_engine()
+
+    def _ensure_terrain(self, terrain: TerrainContext) -> None:
+        import logging
+        logger = logging.getLogger("uvicorn")
+
+        terrain_dir = terrain.dem_path.parent
+        paths = [terrain.dem_path, terrain.landcover_path, terrain.roads_path, terrain.obstacles_path]
+        # The engine prefers GeoJSON text sequences, so a .geojsons layer added next to a
+        # .geojson one must invalidate the loaded terrain too
+        paths += [
+            seq_path
+            for stem in ("roads", "obstacles")
+            if (seq_path := terrain_dir / f"{stem}{GEOJSON_SEQ_SUFFIX}").exists()
+        ]
+        key = (str(terrain_dir), max(path.stat().st_mtime_ns for path in paths))
+        if key == self._loaded_terrain:
+            logger.info(f"♻️  Terrain data from {terrain_dir} already loaded")
+            return
+        logger.info(f"🔄 Reloading terrain data from {terrain_dir}...")
+        self.engine.reload_terrain(str(terrain_dir))
+        self._loaded_terrain = key
 
     def generate_routes(
         self,
@@ -23,10 +50,8 @@ class RoutePlannerMCPTool:
         import logging
         logger = logging.getLogger("uvicorn")
         
-        # Load the terrain data from the uploaded bundle
-        terrain_dir = terrain.dem_path.parent
-        logger.info(f"🔄 Reloading terrain data from {terrain_dir}...")
-        self.engine.reload_terrain(str(terrain_dir))
+        # Load the terrain data from the uploaded bundle unless it is already in the engine
+        self._ensure_terrain(terrain)
         logger.info(f"🧭 Running pathfinding algorithm for {max_candidates} route candidates...")
         result = self.engine.nav_route(
             {
@@ -1,20 +1,43 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import Any, Dict
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, List, Tuple
+
+# Power of two so a user id maps to its shard with a mask
+SHARD_COUNT = 16
+
+_EMPTY: MappingProxyType = MappingProxyType({})
 
 
 class UserMemoryTool:
     """Extremely simple in-memory store for user-specific context."""
 
     def __init__(self) -> None:
-        self._store: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        # Each shard has its own lock so concurrent requests for different users rarely contend
+        self._shards: List[Tuple[Dict[str, Dict[str, Any]], threading.Lock]] = [
+            ({}, threading.Lock()) for _ in range(SHARD_COUNT)
+        ]
+
+    def _shard(self, user_id: str) -> Tuple[Dict[str, Dict[str, Any]], threading.Lock]:
+        return self._shards[hash(user_id) & (SHARD_COUNT - 1)]
 
     def get(self, user_id: str, key: str, default: Any | None = None) -> Any | None:
-        return self._store[user_id].get(key, default)
+        store, lock = self._shard(user_id)
+        with lock:
+            # Reads never create an entry for an unknown user
+            return store.get(user_id, _EMPTY).get(key, default)
 
     def set(self, user_id: str, key: str, value: Any) -> None:
-        self._store[user_id][key] = value
+        store, lock = self._shard(user_id)
+        with lock:
+            # setdefault would build a throwaway dict on every call for existing users
+            entries = store.get(user_id)
+            if entries is None:
+                entries = store[user_id] = {}
+            entries[key] = value
 
     def clear(self, user_id: str) -> None:
-        self._store.pop(user_id, None)
+        store, lock = self._shard(user_id)
+        with lock:
+            store.pop(user_id, None)
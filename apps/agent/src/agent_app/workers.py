@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from agent_app.config import get_settings
+from agent_app.tools.local_terrain import LocalTerrainTool, TerrainContext
+
+
+@lru_cache(maxsize=1)
+def get_terrain_executor() -> ProcessPoolExecutor:
+    """Return the process pool dedicated to terrain bundle conversion."""
+
+    settings = get_settings()
+    # Recycle each worker after one job so large OSM conversions hand their memory back
+    return ProcessPoolExecutor(max_workers=settings.terrain_workers, max_tasks_per_child=1)
+
+
+def shutdown_terrain_executor() -> None:
+    if get_terrain_executor.cache_info().currsize:
+        get_terrain_executor().shutdown(wait=False, cancel_futures=True)
+        get_terrain_executor.cache_clear()
+
+
+def register_terrain_bundle(name: str, archive_path: Path) -> TerrainContext:
+    """Extract or convert an uploaded archive; runs inside a terrain worker process."""
+
+    return LocalTerrainTool().register(name, archive_path=archive_path, auto_activate=True)
@@ -0,0 +1,21 @@
+"""JSON encoding for exports and command-line output, using orjson when it is installed."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional speed-up, see the "fast" extra
+    orjson = None
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes, indented by two spaces when pretty."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(obj, option=option)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import argparse
-import json
 from datetime import datetime
 from typing import Any, Dict
 
+from ._json import dumps
 from .server import RoutePlannerEngine
 
 
@@ -77,7 +77,7 @@ def run_pipeline(args: argparse.Namespace) -> Dict[str, Any]:
 def main() -> None:
     args = parse_args()
     results = run_pipeline(args)
-    print(json.dumps(results, indent=2))
+    print(dumps(results, pretty=True).decode("utf-8"))
 
 
 if __name__ == "__main__":
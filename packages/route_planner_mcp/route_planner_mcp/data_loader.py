@@ -2,9 +2,11 @@ from __future__ import annotations
 
 import json
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Tuple
 
+import numpy as np
 from shapely.geometry import Polygon
 
 from .data_models import (
@@ -19,6 +21,13 @@ from .data_models import (
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 
+# RFC 8142 record separator that starts each GeoJSON text sequence record
+RECORD_SEPARATOR = b"\x1e"
+GEOJSON_SEQ_SUFFIX = ".geojsons"
+
+# Parsed files kept per loader; a bundle is four files, so this covers a couple of bundles
+LOADER_CACHE_SIZE = 8
+
 
 def _parse_timestamp(value: str) -> datetime:
     return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc)
@@ -34,18 +43,34 @@ def _load_grid_metadata(raw: Dict) -> GridMetadata:
     )
 
 
+def _file_key(source: Path) -> Tuple[str, int, int]:
+    """Cache key for a data file: its resolved path plus mtime and size, so edits invalidate it."""
+    resolved = source.resolve()
+    stat = resolved.stat()
+    return str(resolved), stat.st_mtime_ns, stat.st_size
+
+
 def load_dem(path: Path | None = None) -> DEMData:
-    source = path or DATA_DIR / "dem.json"
-    with source.open("r", encoding="utf-8") as fh:
+    return _load_dem(*_file_key(path or DATA_DIR / "dem.json"))
+
+
+@lru_cache(maxsize=LOADER_CACHE_SIZE)
+def _load_dem(source: str, mtime_ns: int, size: int) -> DEMData:
+    with open(source, "r", encoding="utf-8") as fh:
         payload = json.load(fh)
     metadata = _load_grid_metadata(payload)
-    grid = payload["grid"]
+    # Left to infer its dtype so DEMData can tell an integer grid from a float one
+    grid = np.asarray(payload["grid"])
     return DEMData(grid=grid, metadata=metadata)
 
 
 def load_landcover(path: Path | None = None) -> LandcoverData:
-    source = path or DATA_DIR / "landcover.json"
-    with source.open("r", encoding="utf-8") as fh:
+    return _load_landcover(*_file_key(path or DATA_DIR / "landcover.json"))
+
+
+@lru_cache(maxsize=LOADER_CACHE_SIZE)
+def _load_landcover(source: str, mtime_ns: int, size: int) -> LandcoverData:
+    with open(source, "r", encoding="utf-8") as fh:
         payload = json.load(fh)
     metadata = _load_grid_metadata(payload)
     classes = {
@@ -60,12 +85,44 @@ def load_landcover(path: Path | None = None) -> LandcoverData:
     return LandcoverData(grid=payload["grid"], classes=classes, metadata=metadata)
 
 
-def load_obstacles(path: Path | None = None) -> List[Obstacle]:
-    source = path or DATA_DIR / "obstacles.geojson"
+def _iter_geojson_seq(fh: BinaryIO) -> Iterator[Dict[str, Any]]:
+    record: List[bytes] = []
+    for line in fh:
+        if line.startswith(RECORD_SEPARATOR):
+            if record:
+                yield json.loads(b"".join(record))
+            record = [line[1:]]
+        elif record:
+            record.append(line)
+    if record:
+        yield json.loads(b"".join(record))
+
+
+def iter_features(source: Path) -> Iterator[Dict[str, Any]]:
+    """Yield GeoJSON features from a FeatureCollection or, one record at a time, a GeoJSON-Seq file."""
+    if source.suffix == GEOJSON_SEQ_SUFFIX:
+        with source.open("rb") as fh:
+            yield from _iter_geojson_seq(fh)
+        return
     with source.open("r", encoding="utf-8") as fh:
         payload = json.load(fh)
+    yield from payload["features"]
+
+
+def bundle_vector_path(base_path: Path, stem: str) -> Path:
+    """Prefer a GeoJSON-Seq vector layer over the FeatureCollection when a bundle has both."""
+    seq_path = base_path / f"{stem}{GEOJSON_SEQ_SUFFIX}"
+    return seq_path if seq_path.exists() else base_path / f"{stem}.geojson"
+
+
+def load_obstacles(path: Path | None = None) -> List[Obstacle]:
+    return _load_obstacles(*_file_key(path or DATA_DIR / "obstacles.geojson"))
+
+
+@lru_cache(maxsize=LOADER_CACHE_SIZE)
+def _load_obstacles(source: str, mtime_ns: int, size: int) -> List[Obstacle]:
     obstacles: List[Obstacle] = []
-    for feature in payload["features"]:
+    for feature in iter_features(Path(source)):
         coords = [tuple(pt) for pt in feature["geometry"]["coordinates"][0]]
         obstacles.append(
             Obstacle(
@@ -78,11 +135,13 @@ def load_obstacles(path: Path | None = None) -> List[Obstacle]:
 
 
 def load_roads(path: Path | None = None) -> Dict[str, List[Coordinate]]:
-    source = path or DATA_DIR / "roads.geojson"
-    with source.open("r", encoding="utf-8") as fh:
-        payload = json.load(fh)
+    return _load_roads(*_file_key(path or DATA_DIR / "roads.geojson"))
+
+
+@lru_cache(maxsize=LOADER_CACHE_SIZE)
+def _load_roads(source: str, mtime_ns: int, size: int) -> Dict[str, List[Coordinate]]:
     road_network: Dict[str, List[Coordinate]] = {}
-    for feature in payload["features"]:
+    for feature in iter_features(Path(source)):
         road_id = feature["properties"]["id"]
         road_network[road_id] = [tuple(pt) for pt in feature["geometry"]["coordinates"]]
     return road_network
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import InitVar, dataclass, field
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 
 Coordinate = Tuple[float, float]
@@ -26,16 +28,26 @@ class GridMetadata:
 
 @dataclass(slots=True)
 class DEMData:
-    grid: List[List[float]]
+    # Elevations in metres, shape (height, width)
+    grid: np.ndarray
     metadata: GridMetadata
+    # Steepest-neighbour slope raster, filled on first use by terrain.max_slope_raster
+    _max_slopes: Optional[Any] = field(default=None, init=False, repr=False, compare=False)
+    # Whether every source elevation was an integer, so route steps report them as ints again
+    integral: bool = field(default=False, init=False, compare=False)
+
+    def __post_init__(self) -> None:
+        source = np.asarray(self.grid)
+        self.integral = source.dtype.kind in "iu"
+        self.grid = source.astype(np.float64, copy=False)
 
     @property
     def height(self) -> int:
-        return len(self.grid)
+        return self.grid.shape[0]
 
     @property
     def width(self) -> int:
-        return len(self.grid[0]) if self.grid else 0
+        return self.grid.shape[1] if self.grid.ndim == 2 else 0
 
 
 @dataclass(slots=True)
@@ -48,9 +60,36 @@ class LandcoverClass:
 
 @dataclass(slots=True)
 class LandcoverData:
-    grid: List[List[str]]
+    """Landcover stored as a class-id raster, with per-class lookup tables indexed by id."""
+
+    grid: InitVar[Sequence[Sequence[str]]]
     classes: Dict[str, LandcoverClass]
     metadata: GridMetadata
+    class_names: List[str] = field(init=False)
+    class_index: Dict[str, int] = field(init=False, repr=False)
+    codes: np.ndarray = field(init=False, repr=False)
+    cost_lut: np.ndarray = field(init=False, repr=False)
+    exposure_lut: np.ndarray = field(init=False, repr=False)
+    speed_lut: np.ndarray = field(init=False, repr=False)
+    # (name, cost_factor, exposure) per class id, ready to copy onto a RouteStep
+    step_attributes: List[Tuple[str, float, float]] = field(init=False, repr=False)
+
+    def __post_init__(self, grid: Sequence[Sequence[str]]) -> None:
+        self.class_names = list(self.classes)
+        self.class_index = {name: idx for idx, name in enumerate(self.class_names)}
+        try:
+            self.codes = np.array(
+                [[self.class_index[name] for name in row] for row in grid], dtype=np.int16
+            )
+        except KeyError as exc:
+            raise ValueError(f"Landcover grid uses undefined class {exc}") from None
+        classes = [self.classes[name] for name in self.class_names]
+        self.cost_lut = np.array([cls.cost_factor for cls in classes], dtype=np.float64)
+        self.exposure_lut = np.array([cls.exposure for cls in classes], dtype=np.float64)
+        self.speed_lut = np.array([cls.speed_modifier for cls in classes], dtype=np.float64)
+        self.step_attributes = list(
+            zip(self.class_names, self.cost_lut.tolist(), self.exposure_lut.tolist())
+        )
 
 
 @dataclass(slots=True)
@@ -92,6 +131,22 @@ class RouteCandidate:
     hydrology_check: Dict[str, Optional[float]]
     mobility: Dict[str, Any]
     provenance: Dict[str, Any] = field(default_factory=dict)
+    _max_slope: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+    _segment_count: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def max_slope(self) -> float:
+        """Steepest step slope, computed once since steps are fixed after generation."""
+        if self._max_slope is None:
+            self._max_slope = max((step.slope for step in self.steps), default=0.0)
+        return self._max_slope
+
+    @property
+    def segment_count(self) -> int:
+        """Number of segment steps, i.e. steps that are not checkpoint markers."""
+        if self._segment_count is None:
+            self._segment_count = sum(step.step_type == "segment" for step in self.steps)
+        return self._segment_count
 
     def to_geojson_feature(self) -> Dict[str, Any]:
         coordinates = [step.coordinate for step in self.steps]
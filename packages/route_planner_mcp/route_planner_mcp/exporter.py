@@ -1,15 +1,22 @@
 from __future__ import annotations
 
 import hashlib
-import json
 from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
 import re
+import string
 from typing import Dict, Optional
 
+from ._json import dumps
 from .data_models import RouteCandidate, RouteSelectionResult
 
 EXPORT_DIR = Path(__file__).resolve().parent.parent / "exports"
+# Read size when hashing exports on Pythons without hashlib.file_digest
+CHECKSUM_CHUNK_BYTES = 1 << 20
+# Runs of characters that are not safe in an export file name
+UNSAFE_BASENAME_CHARS = re.compile(r"[^A-Za-z0-9_-]+")
+SAFE_BASENAME_CHARS = frozenset(string.ascii_letters + string.digits + "_-")
 
 
 def ensure_export_dir() -> Path:
@@ -18,7 +25,10 @@ def ensure_export_dir() -> Path:
 
 
 def _sanitize_basename(candidate: str, fallback: str) -> str:
-    cleaned = re.sub(r"[^A-Za-z0-9_-]+", "-", candidate.strip())
+    cleaned = candidate.strip()
+    # Route ids are usually safe already, and then the substitution would change nothing
+    if not SAFE_BASENAME_CHARS.issuperset(cleaned):
+        cleaned = UNSAFE_BASENAME_CHARS.sub("-", cleaned)
     cleaned = cleaned.strip("-_")
     return cleaned or fallback
 
@@ -28,39 +38,39 @@ def export_geojson(route: RouteCandidate, base_name: str) -> Path:
     feature = route.to_geojson_feature()
     collection = {"type": "FeatureCollection", "features": [feature]}
     output_path = EXPORT_DIR / f"{base_name}.geojson"
-    output_path.write_text(json.dumps(collection, indent=2), encoding="utf-8")
+    output_path.write_bytes(dumps(collection, pretty=True))
     return output_path
 
 
 def export_gpx(route: RouteCandidate, base_name: str) -> Path:
     ensure_export_dir()
-    template = """<?xml version="1.0" encoding="UTF-8"?>
-<gpx version="1.1" creator="Route Planner MCP" xmlns="http://www.topografix.com/GPX/1/1">
-{waypoints}
-  <trk>
-    <name>{name}</name>
-    <trkseg>
-{segments}
-    </trkseg>
-  </trk>
-</gpx>
-"""
-    segment_template = '      <trkpt lat="{lat}" lon="{lon}"><ele>{ele}</ele></trkpt>'
-    waypoint_template = '  <wpt lat="{lat}" lon="{lon}"><name>{name}</name><desc>{desc}</desc></wpt>'
-    segments = []
-    waypoints = []
-    for step in route.steps:
-        lat, lon = step.coordinate
-        segments.append(segment_template.format(lat=lat, lon=lon, ele=step.elevation))
-        if step.step_type == "checkpoint" and step.label:
-            waypoints.append(
-                waypoint_template.format(lat=lat, lon=lon, name=step.label, desc=f"{step.terrain} {step.km_marker} km")
-            )
-    body = "\n".join(segments)
-    waypoint_body = "\n".join(waypoints)
-    xml = template.format(name=route.id, segments=body, waypoints=waypoint_body)
+    waypoints = [
+        f'  <wpt lat="{step.coordinate[0]}" lon="{step.coordinate[1]}">'
+        f"<name>{step.label}</name><desc>{step.terrain} {step.km_marker} km</desc></wpt>"
+        for step in route.steps
+        if step.step_type == "checkpoint" and step.label
+    ]
+    segments = [
+        f'      <trkpt lat="{step.coordinate[0]}" lon="{step.coordinate[1]}">'
+        f"<ele>{step.elevation}</ele></trkpt>"
+        for step in route.steps
+    ]
+    # One join over every line, so the track body is never copied into a template
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<gpx version="1.1" creator="Route Planner MCP" xmlns="http://www.topografix.com/GPX/1/1">',
+        *(waypoints or [""]),
+        "  <trk>",
+        f"    <name>{route.id}</name>",
+        "    <trkseg>",
+        *(segments or [""]),
+        "    </trkseg>",
+        "  </trk>",
+        "</gpx>",
+        "",
+    ]
     output_path = EXPORT_DIR / f"{base_name}.gpx"
-    output_path.write_text(xml, encoding="utf-8")
+    output_path.write_bytes("\n".join(lines).encode("utf-8"))
     return output_path
 
 
@@ -70,10 +80,10 @@ def export_brief(result: RouteSelectionResult, base_name: str) -> Path:
     route = result.selected_route
     pace = result.pace
     risk = result.risk
-    segment_steps = [step for step in route.steps if step.step_type == "segment"]
-    stride = max(1, len(segment_steps) // 6) if segment_steps else 1
+    stride = max(1, route.segment_count // 6)
+    segment_steps = (step for step in route.steps if step.step_type == "segment")
     checkpoints = []
-    for idx, step in enumerate(segment_steps[::stride]):
+    for idx, step in enumerate(islice(segment_steps, 0, None, stride)):
         label = step.label or f"CP{idx+1}"
         checkpoints.append(
             f"- {label}: {step.coordinate[0]:.5f}, {step.coordinate[1]:.5f} via {step.terrain}"
@@ -120,9 +130,12 @@ def _relative_export_path(path: Path) -> str:
 
 
 def _checksum_sha256(path: Path) -> str:
-    hasher = hashlib.sha256()
     with path.open("rb") as handle:
-        for chunk in iter(lambda: handle.read(8192), b""):
+        # file_digest (3.11+) hashes straight from the file without a Python-level read loop
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(handle, "sha256").hexdigest()
+        hasher = hashlib.sha256()
+        for chunk in iter(lambda: handle.read(CHECKSUM_CHUNK_BYTES), b""):
             hasher.update(chunk)
     return hasher.hexdigest()
 
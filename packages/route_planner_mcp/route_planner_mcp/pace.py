@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import Dict
+from typing import Dict, List
+
+import numpy as np
 
 from .data_models import PaceEstimate, RouteCandidate
 
@@ -10,6 +12,13 @@ NAISMITH_BASE_SPEED_KMH = {
     "wheeled": 8.0,
 }
 
+_BASE_SPEED_ASSUMPTIONS = {
+    mode: f"Naismith base {speed} km/h" for mode, speed in NAISMITH_BASE_SPEED_KMH.items()
+}
+_SLOPE_ASSUMPTION = "+30% time per deg >10° equivalent"
+_LOAD_ASSUMPTION = "+10% time per 10 kg load (applied to {load_kg} kg)"
+_REST_ASSUMPTION = "Rest ratio 10 min per 60 min travel"
+
 
 def naismith_adjusted_speed(
     route: RouteCandidate,
@@ -21,12 +30,17 @@ def naismith_adjusted_speed(
     descent_penalty = max(0.0, (route.descent_m - 300) / 800.0)
 
     load_penalty = load_kg / 20.0 * 0.5  # 0.5 km/h per 20kg
-    slope_penalty = max(step.slope for step in route.steps) / 40.0
+    slope_penalty = route.max_slope / 40.0
 
     adjusted_speed = base_speed - ascent_penalty - descent_penalty - load_penalty - slope_penalty
     return max(adjusted_speed, 1.5)
 
 
+def _assumptions(mode: str, load_kg: float) -> List[str]:
+    base = _BASE_SPEED_ASSUMPTIONS.get(mode, "Naismith base 5.0 km/h")
+    return [base, _SLOPE_ASSUMPTION, _LOAD_ASSUMPTION.format(load_kg=load_kg), _REST_ASSUMPTION]
+
+
 def estimate_travel_time(
     route: RouteCandidate,
     mode: str,
@@ -35,19 +49,55 @@ def estimate_travel_time(
     speed_kmh = naismith_adjusted_speed(route, mode, load_kg)
     travel_time_hours = (route.distance_m / 1000.0) / speed_kmh
     travel_time_minutes = travel_time_hours * 60.0
-    assumptions = [
-        f"Naismith base {NAISMITH_BASE_SPEED_KMH.get(mode, 5.0)} km/h",
-        "+30% time per deg >10° equivalent",
-        f"+10% time per {10} kg load (applied to {load_kg} kg)",
-        "Rest ratio 10 min per 60 min travel",
-    ]
     return PaceEstimate(
         route_id=route.id,
         travel_time_minutes=round(travel_time_minutes, 1),
         mode=mode,
         load_kg=load_kg,
         base_speed_kmh=round(speed_kmh, 2),
-        assumptions=assumptions,
+        assumptions=_assumptions(mode, load_kg),
     )
 
 
+def estimate_travel_time_batch(
+    routes: List[RouteCandidate],
+    mode: str,
+    load_kg: float,
+) -> List[PaceEstimate]:
+    """Estimate travel time for many routes at once; matches estimate_travel_time per route."""
+    count = len(routes)
+    if not count:
+        return []
+    ascent = np.fromiter((route.ascent_m for route in routes), dtype=np.float64, count=count)
+    descent = np.fromiter((route.descent_m for route in routes), dtype=np.float64, count=count)
+    distance = np.fromiter((route.distance_m for route in routes), dtype=np.float64, count=count)
+    max_slope = np.fromiter((route.max_slope for route in routes), dtype=np.float64, count=count)
+
+    base_speed = NAISMITH_BASE_SPEED_KMH.get(mode, 5.0)
+    # Same penalty order as naismith_adjusted_speed so results are bit-identical
+    speed_kmh = np.maximum(
+        base_speed
+        - ascent / 600.0
+        - np.maximum(0.0, (descent - 300) / 800.0)
+        - load_kg / 20.0 * 0.5
+        - max_slope / 40.0,
+        1.5,
+    )
+    travel_time_minutes = (distance / 1000.0) / speed_kmh * 60.0
+    assumptions = _assumptions(mode, load_kg)
+
+    return [
+        PaceEstimate(
+            route_id=route.id,
+            travel_time_minutes=round(minutes, 1),
+            mode=mode,
+            load_kg=load_kg,
+            base_speed_kmh=round(speed, 2),
+            assumptions=list(assumptions),
+        )
+        for route, minutes, speed in zip(
+            routes, travel_time_minutes.tolist(), speed_kmh.tolist()
+        )
+    ]
+
+
@@ -2,28 +2,51 @@ from __future__ import annotations
 
 import heapq
 import math
-from collections import defaultdict
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from functools import partial
 from typing import Dict, Iterable, List, Optional, Tuple
 import logging
 
-from shapely.geometry import Point, Polygon, LineString
-from shapely.ops import nearest_points
+import numpy as np
+from scipy.ndimage import binary_dilation
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+import shapely
+from shapely.geometry import Polygon
 
-from .data_models import RouteCandidate
+from .data_models import DEMData, RouteCandidate
 from .terrain import (
     assemble_route_steps,
     coordinate_to_grid,
     in_bounds,
     route_distance_and_elevation,
-    slope_between,
-    terrain_cost,
-    exposure_score,
-    grid_to_coordinate,
+    segment_lengths,
 )
 
 Coordinate = Tuple[float, float]
 GridIndex = Tuple[int, int]
 
+# Local (lat, lon) degree-to-meter factors used by _approx_distance
+METERS_PER_DEGREE = np.array([111_320.0, 85_000.0])
+# Half of the eight grid moves; the rest are their reverses
+FORWARD_STEPS = ((0, 1), (1, -1), (1, 0), (1, 1))
+# Cells farther than this from any road get no road discount
+ROAD_INFLUENCE_RADIUS_M = 500.0
+# Cost factor for cells closer to a road than each band edge, then for everything beyond
+ROAD_INFLUENCE_BANDS_M = (100.0, 300.0, ROAD_INFLUENCE_RADIUS_M)
+ROAD_INFLUENCE_FACTORS = (0.7, 0.85, 0.95, 1.0)
+# Grids at least this large search their profiles in a long-lived pool of worker processes
+PARALLEL_PROFILE_MIN_CELLS = 250_000
+# Grids at least this large first plan on a grid coarsened by COARSE_FACTOR per side, then
+# search only a corridor of CORRIDOR_BLOCKS coarse cells either side of that plan
+HIERARCHICAL_MIN_CELLS = 1_000_000
+COARSE_FACTOR = 8
+CORRIDOR_BLOCKS = 2
+
 logger = logging.getLogger("uvicorn")
 
 
@@ -37,140 +60,227 @@ def road_network_route(
     Much faster than grid-based A* for road-only data.
     Note: Roads from OSM are (lon, lat) but we work in (lat, lon), so we swap.
     """
+    result = _road_network_search(start, goal, roads)
+    return result[0] if result else None
+
+
+@dataclass(slots=True)
+class _RoadGraph:
+    """Road network prepared for Dijkstra: CSR adjacency plus a tree over the main component."""
+
+    node_coords: List[Coordinate]
+    component: np.ndarray
+    node_tree: cKDTree
+    indptr: List[int]
+    neighbors: List[int]
+    weights: List[float]
+
+
+# Most recent roads dict and what was derived from it, per kind, so repeated queries against
+# the same terrain skip the rebuild; entries are matched by identity and hold the dict alive
+_road_cache: Dict[str, Tuple[Dict[str, List[Coordinate]], object]] = {}
+
+
+def _cached_for_roads(kind: str, roads: Dict[str, List[Coordinate]], build):
+    entry = _road_cache.get(kind)
+    if entry is not None and entry[0] is roads:
+        return entry[1]
+    value = build(roads)
+    _road_cache[kind] = (roads, value)
+    return value
+
+
+def clear_road_cache() -> None:
+    """Forget cached road graphs, trees and search grids, e.g. after mutating roads in place."""
+    _road_cache.clear()
+    _grids_cache.clear()
+    shutdown_profile_pool()
+
+
+def _build_road_graph(roads: Dict[str, List[Coordinate]]) -> Optional[_RoadGraph]:
     logger.info(f"    Building road network graph...")
-    logger.info(f"    Input start: {start}, goal: {goal}")
-    
-    # Build graph: node -> [(neighbor, distance), ...]
     # Roads from GeoJSON are (lon, lat), swap to (lat, lon)
-    graph: Dict[Coordinate, List[Tuple[Coordinate, float]]] = defaultdict(list)
-    all_nodes = set()
-    
-    for road_id, coords in roads.items():
-        for i in range(len(coords) - 1):
-            # Swap from (lon, lat) to (lat, lon)
-            node1 = (coords[i][1], coords[i][0])
-            node2 = (coords[i + 1][1], coords[i + 1][0])
-            dist = _approx_distance(node1, node2)
-            graph[node1].append((node2, dist))
-            graph[node2].append((node1, dist))  # Bidirectional
-            all_nodes.add(node1)
-            all_nodes.add(node2)
-    
-    logger.info(f"    Graph built: {len(all_nodes)} nodes, {len(roads)} roads")
-    
+    chains = [coords for coords in roads.values() if len(coords) > 1]
+    if not chains:
+        return None
+    points = np.asarray([point for coords in chains for point in coords], dtype=np.float64)
+    points = points[:, 1::-1]
+    # Every vertex except the last of each road starts a segment
+    seg_start = np.ones(len(points), dtype=bool)
+    seg_start[np.cumsum([len(coords) for coords in chains]) - 1] = False
+    first = np.flatnonzero(seg_start)
+    # Unique nodes come back sorted, so integer id order matches (lat, lon) tuple order and
+    # the heap breaks distance ties exactly as it did with coordinate entries
+    nodes, inverse = np.unique(
+        np.concatenate([points[first], points[first + 1]]), axis=0, return_inverse=True
+    )
+    inverse = inverse.ravel()
+    node1, node2 = inverse[: len(first)], inverse[len(first):]
+    delta = (points[first + 1] - points[first]) * METERS_PER_DEGREE
+    seg_dist = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+
+    # Both directions of each segment, in the order the old per-node lists were appended
+    edge_from = np.column_stack([node1, node2]).ravel()
+    edge_to = np.column_stack([node2, node1]).ravel()
+    edge_dist = np.repeat(seg_dist, 2)
+    num_nodes = len(nodes)
+    logger.info(f"    Graph built: {num_nodes} nodes, {len(roads)} roads")
+
     # Find the largest connected component (to avoid disconnected road segments)
     logger.info(f"    Finding largest connected component...")
-    def find_connected_component(node: Coordinate) -> set:
-        component = set()
-        queue = [node]
-        while queue:
-            current = queue.pop(0)
-            if current in component:
-                continue
-            component.add(current)
-            for neighbor, _ in graph[current]:
-                if neighbor not in component:
-                    queue.append(neighbor)
-        return component
-    
-    # Find largest component by sampling
-    components = []
-    checked = set()
-    for node in list(all_nodes)[:min(100, len(all_nodes))]:  # Sample first 100 nodes
-        if node not in checked:
-            comp = find_connected_component(node)
-            components.append(comp)
-            checked.update(comp)
-            if len(checked) >= len(all_nodes) * 0.9:  # If we've checked 90%, stop
-                break
-    
-    if components:
-        largest_component = max(components, key=len)
-        logger.info(f"    Largest component: {len(largest_component)} nodes ({len(largest_component)/len(all_nodes)*100:.1f}% of total)")
-        nodes_list = list(largest_component)
-    else:
-        logger.warning("    Could not find connected components, using all nodes")
-        nodes_list = list(all_nodes)
-    
+    adjacency = csr_matrix(
+        (np.ones(len(edge_from), dtype=np.int8), (edge_from, edge_to)),
+        shape=(num_nodes, num_nodes),
+    )
+    _, labels = connected_components(adjacency, directed=False)
+    largest_component = np.flatnonzero(labels == np.bincount(labels).argmax())
+    logger.info(f"    Largest component: {len(largest_component)} nodes ({len(largest_component)/num_nodes*100:.1f}% of total)")
+
+    # CSR adjacency: neighbours of node n are neighbors[indptr[n]:indptr[n + 1]]; the stable
+    # sort keeps each node's edges in insertion order
+    order = np.argsort(edge_from, kind="stable")
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(edge_from, minlength=num_nodes), out=indptr[1:])
+    return _RoadGraph(
+        node_coords=list(map(tuple, nodes.tolist())),
+        component=largest_component,
+        # Scaling lat/lon to meters makes Euclidean tree distance match _approx_distance
+        node_tree=cKDTree(nodes[largest_component] * METERS_PER_DEGREE),
+        indptr=indptr.tolist(),
+        neighbors=edge_to[order].tolist(),
+        weights=edge_dist[order].tolist(),
+    )
+
+
+def _road_network_search(
+    start: Coordinate,
+    goal: Coordinate,
+    roads: Dict[str, List[Coordinate]],
+) -> Optional[Tuple[List[Coordinate], List[float]]]:
+    """Dijkstra over the road graph; returns the path and the length of each of its segments."""
+    logger.info(f"    Input start: {start}, goal: {goal}")
+    graph = _cached_for_roads("graph", roads, _build_road_graph)
+    if graph is None:
+        logger.warning("    ⚠️  Road network has no segments")
+        return None
+    node_coords = graph.node_coords
+    indptr, neighbors, weights = graph.indptr, graph.neighbors, graph.weights
+    num_nodes = len(node_coords)
+
     # Find nearest nodes to start/goal within the largest component
     logger.info(f"    Finding nearest road nodes to start/goal in main component...")
-    start_node = min(nodes_list, key=lambda n: _approx_distance(n, start))
-    goal_node = min(nodes_list, key=lambda n: _approx_distance(n, goal))
-    
+    _, (start_i, goal_i) = graph.node_tree.query(np.asarray([start, goal]) * METERS_PER_DEGREE)
+    start_id = int(graph.component[start_i])
+    goal_id = int(graph.component[goal_i])
+    start_node = node_coords[start_id]
+    goal_node = node_coords[goal_id]
+
     start_dist = _approx_distance(start_node, start)
     goal_dist = _approx_distance(goal_node, goal)
     logger.info(f"    Nearest to start: {start_node} ({start_dist:.1f}m away)")
     logger.info(f"    Nearest to goal: {goal_node} ({goal_dist:.1f}m away)")
-    
+
     # Check if start and goal are actually the same node (already connected)
-    if start_node == goal_node:
+    if start_id == goal_id:
         logger.warning("    ⚠️  Start and goal map to the same road node! Returning trivial path")
-        return [start_node]
-    
+        return [start_node], []
+
     logger.info(f"    Running Dijkstra from {start_node} to {goal_node}...")
-    
-    # Dijkstra's algorithm
-    distances: Dict[Coordinate, float] = {start_node: 0.0}
-    came_from: Dict[Coordinate, Coordinate] = {}
-    pq = [(0.0, start_node)]
-    visited = set()
+
+    # Dijkstra's algorithm over integer node ids
+    distances = [math.inf] * num_nodes
+    distances[start_id] = 0.0
+    came_from = [-1] * num_nodes
+    # Length of the edge each node was reached by, so callers need not recompute it
+    came_dist = [0.0] * num_nodes
+    pq: List[Tuple[float, int]] = [(0.0, start_id)]
+    visited = bytearray(num_nodes)
+    visited_count = 0
     iterations = 0
     max_iterations = 100000  # Prevent infinite loops
-    
+
     while pq and iterations < max_iterations:
         iterations += 1
         if iterations % 5000 == 0:
-            logger.info(f"      Dijkstra iterations: {iterations}, queue: {len(pq)}, visited: {len(visited)}")
-        
+            logger.info(f"      Dijkstra iterations: {iterations}, queue: {len(pq)}, visited: {visited_count}")
+
         current_dist, current = heapq.heappop(pq)
-        
-        if current in visited:
+
+        if visited[current]:
             continue
-        visited.add(current)
-        
-        if current == goal_node:
+        visited[current] = 1
+        visited_count += 1
+
+        if current == goal_id:
             logger.info(f"    ✅ Path found in {iterations} iterations!")
             # Reconstruct path
-            path = [current]
-            while current in came_from:
+            path = [node_coords[current]]
+            segment_dists: List[float] = []
+            while came_from[current] != -1:
+                segment_dists.append(came_dist[current])
                 current = came_from[current]
-                path.append(current)
-            return list(reversed(path))
-        
-        for neighbor, edge_dist in graph[current]:
-            if neighbor in visited:
+                path.append(node_coords[current])
+            return path[::-1], segment_dists[::-1]
+
+        for k in range(indptr[current], indptr[current + 1]):
+            neighbor = neighbors[k]
+            if visited[neighbor]:
                 continue
-            
-            new_dist = current_dist + edge_dist
-            if new_dist < distances.get(neighbor, float('inf')):
+
+            new_dist = current_dist + weights[k]
+            if new_dist < distances[neighbor]:
                 distances[neighbor] = new_dist
                 came_from[neighbor] = current
+                came_dist[neighbor] = weights[k]
                 heapq.heappush(pq, (new_dist, neighbor))
-    
+
     logger.warning(f"    ⚠️  No path found after {iterations} iterations")
     return None
 
 
-def _cell_centroid(row: int, col: int, origin: Coordinate, cell_size: float) -> Point:
-    lat = origin[0] + ((row + 0.5) * cell_size) / 111_320.0
-    lon = origin[1] + ((col + 0.5) * cell_size) / 85_000.0
-    return Point(lon, lat)
-
-
-def _is_blocked(
-    row: int,
-    col: int,
-    obstacle_index: Optional[STRtree],
-) -> bool:
-    if obstacle_index is None:
-        return False
-    centroid = _cell_centroid(
-        row,
-        col,
-        obstacle_index.geometries[0].bounds[:2],  # placeholder, overwritten later
-        1.0,
-    )
-    return any(poly.contains(centroid) for poly in obstacle_index.geometries)
+def _obstacle_mask(
+    obstacles: List[Polygon],
+    height: int,
+    width: int,
+    origin: Coordinate,
+    cell_size: float,
+) -> bytes:
+    """Flat row-major mask of cells whose centroid falls inside any obstacle polygon."""
+    mask = np.zeros((height, width), dtype=bool)
+    for poly in obstacles:
+        min_lon, min_lat, max_lon, max_lat = poly.bounds
+        # Only test the cells under the polygon's bounding box, with a cell of slack either side
+        r0 = max(int(math.floor((min_lat - origin[0]) * 111_320.0 / cell_size - 0.5)) - 1, 0)
+        r1 = min(int(math.ceil((max_lat - origin[0]) * 111_320.0 / cell_size - 0.5)) + 2, height)
+        c0 = max(int(math.floor((min_lon - origin[1]) * 85_000.0 / cell_size - 0.5)) - 1, 0)
+        c1 = min(int(math.ceil((max_lon - origin[1]) * 85_000.0 / cell_size - 0.5)) + 2, width)
+        if r0 >= r1 or c0 >= c1:
+            continue
+        lats = origin[0] + ((np.arange(r0, r1) + 0.5) * cell_size) / 111_320.0
+        lons = origin[1] + ((np.arange(c0, c1) + 0.5) * cell_size) / 85_000.0
+        mask[r0:r1, c0:c1] |= shapely.contains_xy(poly, lons[None, :], lats[:, None])
+    return mask.tobytes()
+
+
+def _edge_slopes(dem) -> Dict[GridIndex, np.ndarray]:
+    """Slope in degrees from each cell to its neighbour one step in each forward direction.
+
+    Every move is either a forward step or the reverse of one, so four flat row-major arrays
+    cover all eight neighbours.
+    """
+    elevations = dem.grid
+    height, width = elevations.shape
+    cell_size = dem.metadata.cell_size_m
+    slopes: Dict[GridIndex, np.ndarray] = {}
+    for dr, dc in FORWARD_STEPS:
+        c0, c1 = max(0, -dc), width - max(0, dc)
+        rise = np.abs(elevations[dr:, c0 + dc : c1 + dc] - elevations[: height - dr, c0:c1])
+        slope = np.zeros((height, width))
+        slope[: height - dr, c0:c1] = np.degrees(
+            np.arctan(rise / (cell_size * math.sqrt(dr**2 + dc**2)))
+        )
+        slopes[(dr, dc)] = slope.ravel()
+    return slopes
 
 
 def _approx_distance(coord1: Coordinate, coord2: Coordinate) -> float:
@@ -181,22 +291,154 @@ def _approx_distance(coord1: Coordinate, coord2: Coordinate) -> float:
     return math.sqrt(dlat**2 + dlon**2)
 
 
-def _road_influence(
-    roads: Dict[str, List[Coordinate]],
-    coord: Coordinate,
-) -> float:
-    if not roads:
-        return 1.0
-    best_distance = min(
-        _approx_distance(coord, road_coord) for road in roads.values() for road_coord in road
+def _road_tree(roads: Dict[str, List[Coordinate]]) -> Optional[cKDTree]:
+    """Index every road vertex, scaled like _approx_distance, for nearest-road queries."""
+    points = [point for road in roads.values() for point in road]
+    if not points:
+        return None
+    return cKDTree(np.asarray(points, dtype=np.float64) * METERS_PER_DEGREE)
+
+
+def _road_bands(dem, roads: Dict[str, List[Coordinate]]) -> bytes:
+    """Index into ROAD_INFLUENCE_FACTORS for every cell by its distance to the nearest road vertex.
+
+    Flattened row-major; computed with one batched tree query so A* reads a byte per cell.
+    """
+    num_cells = dem.height * dem.width
+    road_tree = _cached_for_roads("tree", roads, _road_tree)
+    if road_tree is None:
+        return bytes([len(ROAD_INFLUENCE_BANDS_M)]) * num_cells
+    origin_lat, origin_lon = dem.metadata.origin
+    cell = dem.metadata.cell_size_m
+    # Cell coordinates exactly as grid_to_coordinate reports them
+    lats = np.round(origin_lat + (np.arange(dem.height) * cell) / 111_320.0, 6)
+    lons = np.round(origin_lon + (np.arange(dem.width) * cell) / 85_000.0, 6)
+    cells = np.stack(np.meshgrid(lats, lons, indexing="ij"), axis=-1).reshape(num_cells, 2)
+    # Only the distance bands matter, so let the tree stop searching past the widest one
+    distances, _ = road_tree.query(
+        cells * METERS_PER_DEGREE, distance_upper_bound=ROAD_INFLUENCE_RADIUS_M
+    )
+    bands = np.searchsorted(ROAD_INFLUENCE_BANDS_M, distances, side="right")
+    return bands.astype(np.uint8).tobytes()
+
+
+@dataclass(slots=True)
+class _SearchGrids:
+    """Per-cell lookups shared by every A* profile over one terrain, flattened row-major."""
+
+    terrain_names: List[str]
+    terrain_ids: List[int]
+    edge_slopes: Dict[GridIndex, np.ndarray]
+    road_bands: bytes
+    # terrain id * len(ROAD_INFLUENCE_FACTORS) + road band, indexing a profile's factor table
+    cell_factor_ids: List[int]
+    blocked: Optional[bytes]
+
+
+def _search_grids(dem, landcover, obstacles: List[Polygon], roads) -> _SearchGrids:
+    blocked = None
+    if obstacles:
+        # Obstacles are rasterised once so a blocked check is a single byte lookup
+        blocked = _obstacle_mask(
+            obstacles, dem.height, dem.width, dem.metadata.origin, dem.metadata.cell_size_m
+        )
+    road_bands = _road_bands(dem, roads)
+    cell_factor_ids = landcover.codes.ravel().astype(np.intp) * len(ROAD_INFLUENCE_FACTORS)
+    cell_factor_ids += np.frombuffer(road_bands, dtype=np.uint8)
+    return _SearchGrids(
+        terrain_names=landcover.class_names,
+        terrain_ids=landcover.codes.ravel().tolist(),
+        edge_slopes=_edge_slopes(dem),
+        road_bands=road_bands,
+        cell_factor_ids=cell_factor_ids.tolist(),
+        blocked=blocked,
+    )
+
+
+# Search grids for the most recent (dem, landcover, obstacles, roads), matched by identity like
+# _road_cache, so repeated routes over one terrain rasterise obstacles and roads only once
+_grids_cache: Dict[str, Tuple[Tuple[object, ...], _SearchGrids]] = {}
+
+
+def _cached_search_grids(dem, landcover, obstacle_polys, roads) -> _SearchGrids:
+    sources = (dem, landcover, obstacle_polys, roads)
+    entry = _grids_cache.get("grids")
+    if entry is not None and all(cached is source for cached, source in zip(entry[0], sources)):
+        return entry[1]
+    grids = _search_grids(dem, landcover, list(obstacle_polys), roads)
+    _grids_cache["grids"] = (sources, grids)
+    return grids
+
+
+@dataclass(slots=True)
+class _CoarseGrids:
+    """A coarsened copy of a terrain for planning the corridor a full-resolution search keeps to."""
+
+    dem: DEMData
+    grids: _SearchGrids
+    # Rows and columns of fine padding before the first block, so block centres land on
+    # the cells coordinate_to_grid maps to
+    offset: int
+
+
+def _blocks(values: np.ndarray, factor: int) -> np.ndarray:
+    """View a fine raster as (rows, factor, cols, factor) blocks centred on every factor-th cell."""
+    offset = factor // 2
+    height, width = values.shape
+    rows = (height - 1 + offset) // factor + 1
+    cols = (width - 1 + offset) // factor + 1
+    padded = np.pad(
+        values,
+        ((offset, rows * factor - height - offset), (offset, cols * factor - width - offset)),
+        mode="edge",
+    )
+    return padded.reshape(rows, factor, cols, factor)
+
+
+def _coarse_grids(dem, landcover, grids: _SearchGrids, factor: int) -> _CoarseGrids:
+    shape = (dem.height, dem.width)
+    offset = factor // 2
+    coarse_dem = DEMData(
+        grid=_blocks(dem.grid, factor).mean(axis=(1, 3)),
+        metadata=replace(dem.metadata, cell_size_m=dem.metadata.cell_size_m * factor),
+    )
+    codes = _blocks(landcover.codes, factor)[:, offset, :, offset]
+    # A block takes its nearest road band, and is blocked if any of its cells is so that thin
+    # walls still stop the coarse plan; a gap narrower than a block falls back to a full search
+    bands = _blocks(np.frombuffer(grids.road_bands, dtype=np.uint8).reshape(shape), factor)
+    bands = bands.min(axis=(1, 3))
+    blocked = None
+    if grids.blocked is not None:
+        fine_blocked = np.frombuffer(grids.blocked, dtype=bool).reshape(shape)
+        blocked = _blocks(fine_blocked, factor).any(axis=(1, 3)).tobytes()
+    cell_factor_ids = codes.astype(np.intp) * len(ROAD_INFLUENCE_FACTORS) + bands
+    coarse = _SearchGrids(
+        terrain_names=grids.terrain_names,
+        terrain_ids=codes.ravel().tolist(),
+        edge_slopes=_edge_slopes(coarse_dem),
+        road_bands=bands.tobytes(),
+        cell_factor_ids=cell_factor_ids.ravel().tolist(),
+        blocked=blocked,
+    )
+    return _CoarseGrids(dem=coarse_dem, grids=coarse, offset=offset)
+
+
+def _corridor_grids(
+    coarse_path: List[GridIndex], dem, grids: _SearchGrids, coarse: _CoarseGrids
+) -> _SearchGrids:
+    """grids with every cell outside the corridor around coarse_path marked as blocked."""
+    corridor = np.zeros((coarse.dem.height, coarse.dem.width), dtype=bool)
+    rows, cols = zip(*coarse_path)
+    corridor[rows, cols] = True
+    corridor = binary_dilation(
+        corridor, structure=np.ones((3, 3), dtype=bool), iterations=CORRIDOR_BLOCKS
     )
-    if best_distance < 100:  # meters
-        return 0.7
-    if best_distance < 300:
-        return 0.85
-    if best_distance < 500:
-        return 0.95
-    return 1.0
+    factor, offset = COARSE_FACTOR, coarse.offset
+    corridor = corridor.repeat(factor, axis=0).repeat(factor, axis=1)
+    outside = ~corridor[offset : offset + dem.height, offset : offset + dem.width]
+    if grids.blocked is not None:
+        outside |= np.frombuffer(grids.blocked, dtype=bool).reshape(outside.shape)
+    return replace(grids, blocked=outside.tobytes())
 
 
 def heuristic(a: GridIndex, b: GridIndex, cell_size: float) -> float:
@@ -214,93 +456,107 @@ def a_star_route(
     terrain_multipliers: Optional[Dict[str, float]] = None,
     exposure_penalty: float = 0.0,
     road_bias: float = 1.0,
+    grids: Optional[_SearchGrids] = None,
 ) -> Optional[List[GridIndex]]:
+    """Grid A* for one cost profile; obstacles and roads are only read when grids is not given."""
     start_idx = coordinate_to_grid(start, dem)
     goal_idx = coordinate_to_grid(goal, dem)
     if not in_bounds(*start_idx, dem) or not in_bounds(*goal_idx, dem):
         return None
 
-    obstacle_list = list(obstacle_polys)
     cell_size = dem.metadata.cell_size_m
-    origin = dem.metadata.origin
-
-    def cell_blocked(row: int, col: int) -> bool:
-        if not obstacle_list:
-            return False
-        centroid = _cell_centroid(row, col, origin, cell_size)
-        for poly in obstacle_list:
-            if poly.contains(centroid):
-                return True
-        return False
-
-    open_set: List[Tuple[float, GridIndex]] = []
-    heapq.heappush(open_set, (0, start_idx))
-
-    came_from: Dict[GridIndex, GridIndex] = {}
-    g_score: Dict[GridIndex, float] = {start_idx: 0.0}
-    f_score: Dict[GridIndex, float] = {start_idx: heuristic(start_idx, goal_idx, cell_size)}
-
-    neighbors = [
-        (-1, -1),
-        (-1, 0),
-        (-1, 1),
-        (0, -1),
-        (0, 1),
-        (1, -1),
-        (1, 0),
-        (1, 1),
+    grids = grids or _search_grids(dem, landcover, list(obstacle_polys), roads)
+
+    # Cells are flattened to row * width + col; integer order matches (row, col) tuple order,
+    # so heap ties still resolve the same way
+    height, width = dem.height, dem.width
+    num_cells = height * width
+    # Terrain, road and exposure factors depend only on the cell entered, through its terrain
+    # class and road band, so their product is tabulated once per (class, band) pair
+    multipliers = terrain_multipliers or {}
+    road_table = [
+        math.pow(factor, road_bias) if road_bias != 1.0 else factor
+        for factor in ROAD_INFLUENCE_FACTORS
     ]
+    cell_factor_table = [
+        landcover.classes[name].cost_factor
+        * multipliers.get(name, 1.0)
+        * road_factor
+        * (1.0 + exposure_penalty * landcover.classes[name].exposure)
+        for name in grids.terrain_names
+        for road_factor in road_table
+    ]
+    cell_factor_ids = grids.cell_factor_ids
+    blocked = grids.blocked
+    start_id = start_idx[0] * width + start_idx[1]
+    goal_id = goal_idx[0] * width + goal_idx[1]
+
+    # Straight-line distance to the goal for every cell, in one vectorised pass
+    rows, cols = np.divmod(np.arange(num_cells), width)
+    h_score = memoryview(
+        cell_size * np.sqrt((rows - goal_idx[0]) ** 2 + (cols - goal_idx[1]) ** 2)
+    )
+
+    open_set: List[Tuple[float, int]] = []
+    heapq.heappush(open_set, (0, start_id))
+
+    came_from = [-1] * num_cells
+    g_score = [math.inf] * num_cells
+    g_score[start_id] = 0.0
+
+    # Each move carries its fixed length; slopes are symmetric, so a backward move reads the
+    # forward slope anchored at the neighbour. Memoryviews index to plain floats.
+    edge_slopes = {step: memoryview(slopes) for step, slopes in grids.edge_slopes.items()}
+    neighbors = []
+    for dr, dc in ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)):
+        move_cost = cell_size * math.sqrt(dr**2 + dc**2)
+        if (dr, dc) in edge_slopes:
+            neighbors.append((dr, dc, move_cost, edge_slopes[(dr, dc)], False))
+        else:
+            neighbors.append((dr, dc, move_cost, edge_slopes[(-dr, -dc)], True))
 
     import logging
     logger = logging.getLogger("uvicorn")
     iterations = 0
     log_interval = 10000
+    heappush, heappop = heapq.heappush, heapq.heappop
 
     while open_set:
         iterations += 1
         if iterations % log_interval == 0:
             logger.info(f"    A* iterations: {iterations}, open set size: {len(open_set)}")
-        _, current = heapq.heappop(open_set)
-        if current == goal_idx:
-            path: List[GridIndex] = [current]
-            while current in came_from:
+        f, current = heappop(open_set)
+        if current == goal_id:
+            path: List[GridIndex] = [divmod(current, width)]
+            while came_from[current] != -1:
                 current = came_from[current]
-                path.append(current)
+                path.append(divmod(current, width))
             return list(reversed(path))
+        # Lazy decrease-key: an entry whose cell has since been reached more cheaply was already
+        # expanded at the better score, so re-expanding it cannot improve anything
+        if current != start_id and f != g_score[current] + h_score[current]:
+            continue
 
-        for dr, dc in neighbors:
-            nr, nc = current[0] + dr, current[1] + dc
-            if not in_bounds(nr, nc, dem):
+        row, col = divmod(current, width)
+        for dr, dc, move_cost, slopes, from_neighbor in neighbors:
+            nr, nc = row + dr, col + dc
+            if not (0 <= nr < height and 0 <= nc < width):
                 continue
-            if cell_blocked(nr, nc):
+            neighbor = nr * width + nc
+            if blocked is not None and blocked[neighbor]:
                 continue
 
-            terrain_name = landcover.grid[nr][nc]
-            terrain_factor = terrain_cost(landcover, nr, nc)
-            if terrain_multipliers:
-                terrain_factor *= terrain_multipliers.get(terrain_name, 1.0)
-            slope = slope_between(dem, current[0], current[1], nr, nc)
+            slope = slopes[neighbor if from_neighbor else current]
             slope_factor = 1.0 + (slope / 30.0) * slope_weight
-
-            coord = grid_to_coordinate(nr, nc, dem)
-            road_factor = _road_influence(roads, coord)
-            if road_bias != 1.0:
-                road_factor = math.pow(road_factor, road_bias)
-
-            exposure_factor = 1.0 + exposure_penalty * exposure_score(landcover, nr, nc)
-
-            move_cost = cell_size * math.sqrt(dr**2 + dc**2)
             tentative_g = (
                 g_score[current]
-                + move_cost * terrain_factor * slope_factor * road_factor * exposure_factor
+                + move_cost * slope_factor * cell_factor_table[cell_factor_ids[neighbor]]
             )
 
-            neighbor = (nr, nc)
-            if tentative_g < g_score.get(neighbor, float("inf")):
+            if tentative_g < g_score[neighbor]:
                 came_from[neighbor] = current
                 g_score[neighbor] = tentative_g
-                f_score[neighbor] = tentative_g + heuristic(neighbor, goal_idx, cell_size)
-                heapq.heappush(open_set, (f_score[neighbor], neighbor))
+                heappush(open_set, (tentative_g + h_score[neighbor], neighbor))
 
     return None
 
@@ -320,19 +576,19 @@ def generate_road_network_candidates(
     
     # For road networks, we'll generate one main route
     logger.info(f"  🔍 Computing road network route...")
-    path = road_network_route(start, goal, roads)
+    result = _road_network_search(start, goal, roads)
     
-    if not path:
+    if not result:
         logger.error("  ❌ No road network path found")
         return candidates
+    path, segment_dists = result
     
     logger.info(f"  ✅ Route found ({len(path)} waypoints)")
     logger.info(f"    Start: {path[0]}, End: {path[-1]}")
     
     # Calculate distance
     total_distance = 0.0
-    for i in range(len(path) - 1):
-        seg_dist = _approx_distance(path[i], path[i + 1])
+    for i, seg_dist in enumerate(segment_dists):
         total_distance += seg_dist
         if i < 3:  # Log first few segments
             logger.info(f"    Segment {i}: {path[i]} -> {path[i+1]}, dist={seg_dist:.2f}m")
@@ -346,8 +602,7 @@ def generate_road_network_candidates(
     
     for i, coord in enumerate(path):
         if i > 0:
-            seg_dist = _approx_distance(path[i - 1], coord)
-            km_marker += seg_dist / 1000.0
+            km_marker += segment_dists[i - 1] / 1000.0
         
         steps.append(RouteStep(
             segment_id=i,
@@ -388,34 +643,96 @@ def generate_road_network_candidates(
     
     # Generate 2 more "variants" with slightly different costs for demo purposes
     # (In reality, for road networks, we'd need alternative path algorithms like k-shortest paths)
+    # Variants share the steps and the read-only metadata dicts; provenance gets its own copy
+    # because the engine stamps a sequence id into it per route
     for i in range(2, min(max_candidates + 1, 4)):
-        variant = RouteCandidate(
+        variant = replace(
+            candidate,
             id=f"route-{i}",
-            steps=steps,  # Same path for now
-            distance_m=candidate.distance_m,
-            ascent_m=0.0,
-            descent_m=0.0,
             estimated_cost=round(candidate.estimated_cost * (0.95 + i * 0.05), 3),  # Slight variation
-            composite=None,
             constraints_used={"mode": "road", "source": "osm", "variant": i},
-            score_breakdown={"distance": round(total_distance / 1000.0, 3)},
-            uncertainty={"note": "OSM roads only, no terrain data"},
-            coverage={"road": round(total_distance / 1000.0, 3)},
-            coverage_units="km",
-            estimated_cost_notes="Distance-based cost (km) - no terrain factors available",
-            hydrology_check={"crossings": 0, "nearest_water_m": None},
-            mobility={"surface_mix": {"road_pct": 100.0}, "avg_slope_deg": 0.0},
-            provenance={
-                "algorithm": "road_network_dijkstra",
-                "osm_roads": len(roads),
-                "generated_at": datetime.now(timezone.utc).isoformat(),
-            },
+            provenance=dict(candidate.provenance),
         )
         candidates.append(variant)
     
     return candidates
 
 
+def _run_profile(
+    start: Coordinate,
+    goal: Coordinate,
+    dem,
+    landcover,
+    roads: Dict[str, List[Coordinate]],
+    grids: _SearchGrids,
+    coarse: Optional[_CoarseGrids],
+    profile: Dict,
+) -> Optional[List[GridIndex]]:
+    search = partial(
+        a_star_route,
+        start,
+        goal,
+        obstacle_polys=(),
+        roads=roads,
+        landcover=landcover,
+        slope_weight=profile["slope_weight"],
+        terrain_multipliers=profile["terrain_multipliers"],
+        exposure_penalty=profile["exposure_penalty"],
+        road_bias=profile["road_bias"],
+    )
+    if coarse is not None:
+        coarse_path = search(dem=coarse.dem, grids=coarse.grids)
+        if coarse_path:
+            path = search(dem=dem, grids=_corridor_grids(coarse_path, dem, grids, coarse))
+            if path:
+                return path
+        # The corridor can miss a passage narrower than a coarse block; search everything
+        logger.info(f"  ↩️  Corridor search failed for {profile['id']}, searching full grid")
+    return search(dem=dem, grids=grids)
+
+
+# The profile worker pool and the search grids its workers were started with; workers keep
+# their terrain until the grids change, so only a new terrain is pickled across to them
+_profile_pool: Dict[str, Tuple[_SearchGrids, ProcessPoolExecutor]] = {}
+# Terrain searched by this process when it is a profile worker, set once by the initializer
+_worker_terrain: Optional[Tuple[object, ...]] = None
+
+
+def _init_profile_worker(dem, landcover, roads, grids, coarse) -> None:
+    global _worker_terrain
+    _worker_terrain = (dem, landcover, roads, grids, coarse)
+
+
+def _run_worker_profile(
+    start: Coordinate, goal: Coordinate, profile: Dict
+) -> Optional[List[GridIndex]]:
+    return _run_profile(start, goal, *_worker_terrain, profile)
+
+
+def _profile_executor(dem, landcover, roads, grids, coarse, workers: int) -> ProcessPoolExecutor:
+    entry = _profile_pool.get("pool")
+    if entry is not None and entry[0] is grids:
+        return entry[1]
+    shutdown_profile_pool()
+    # Never fork: the engine runs inside a threaded server, and forked children inherit its locks
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(method),
+        initializer=_init_profile_worker,
+        initargs=(dem, landcover, roads, grids, coarse),
+    )
+    _profile_pool["pool"] = (grids, executor)
+    return executor
+
+
+def shutdown_profile_pool() -> None:
+    """Stop the profile worker processes, if any were started."""
+    entry = _profile_pool.pop("pool", None)
+    if entry is not None:
+        entry[1].shutdown(wait=False, cancel_futures=True)
+
+
 def generate_route_candidates(
     start: Coordinate,
     goal: Coordinate,
@@ -429,7 +746,7 @@ def generate_route_candidates(
     logger = logging.getLogger("uvicorn")
     
     # Check if we have placeholder terrain (10x10 grid indicates OSM-only data)
-    is_placeholder = len(dem.grid) <= 10 and len(dem.grid[0]) <= 10
+    is_placeholder = dem.height <= 10 and dem.width <= 10
     
     if is_placeholder and len(roads) > 0:
         logger.info("🛣️  Detected OSM-only terrain, using road network routing...")
@@ -468,21 +785,33 @@ def generate_route_candidates(
         },
     ][:max_candidates]
     candidates: List[RouteCandidate] = []
+    # Every profile searches the same grids, so index terrain, slopes, roads and obstacles once
+    grids = _cached_search_grids(dem, landcover, obstacle_polys, roads)
+    width = dem.width
+    # Hydrology classification per terrain id, so names are lowercased once rather than per step
+    hydrology_terms = ("wetland", "water")
+    hydro_terrain = np.array(
+        [any(term in name.lower() for term in hydrology_terms) for name in grids.terrain_names],
+        dtype=bool,
+    )
+    # (name, cost, exposure) per terrain id
+    class_steps = landcover.step_attributes
+    coarse = None
+    if dem.height * dem.width >= HIERARCHICAL_MIN_CELLS:
+        coarse = _coarse_grids(dem, landcover, grids, COARSE_FACTOR)
+    workers = min(len(profiles), os.cpu_count() or 1)
+    if workers > 1 and dem.height * dem.width >= PARALLEL_PROFILE_MIN_CELLS:
+        logger.info(f"  🔍 Computing {len(profiles)} routes in parallel ({workers} workers)...")
+        executor = _profile_executor(dem, landcover, roads, grids, coarse, workers)
+        paths = list(executor.map(partial(_run_worker_profile, start, goal), profiles))
+    else:
+        search = partial(_run_profile, start, goal, dem, landcover, roads, grids, coarse)
+        paths = []
+        for idx, profile in enumerate(profiles, start=1):
+            logger.info(f"  🔍 Computing route {idx}/{max_candidates} (profile: {profile['label']})...")
+            paths.append(search(profile))
 
-    for idx, profile in enumerate(profiles, start=1):
-        logger.info(f"  🔍 Computing route {idx}/{max_candidates} (profile: {profile['label']})...")
-        path = a_star_route(
-            start,
-            goal,
-            dem,
-            landcover,
-            obstacle_polys,
-            roads,
-            slope_weight=profile["slope_weight"],
-            terrain_multipliers=profile["terrain_multipliers"],
-            exposure_penalty=profile["exposure_penalty"],
-            road_bias=profile["road_bias"],
-        )
+    for idx, (profile, path) in enumerate(zip(profiles, paths), start=1):
         if not path:
             logger.warning(f"  ⚠️  Route {idx} failed - no path found")
             continue
@@ -493,12 +822,15 @@ def generate_route_candidates(
         if not segment_steps:
             continue
 
-        terrain_adjusted = [
-            step.cost * profile["terrain_multipliers"].get(step.terrain, 1.0) for step in segment_steps
-        ]
-        avg_slope = sum(step.slope for step in segment_steps) / len(segment_steps)
-        avg_terrain = sum(terrain_adjusted) / len(terrain_adjusted)
-        avg_exposure = sum(step.exposure for step in segment_steps) / len(segment_steps)
+        # Per-step columns read once; class attributes come from per-class tables by terrain id.
+        # Summed with sum() in path order so scores match a step-by-step accumulation exactly
+        path_ids = [grids.terrain_ids[r * width + c] for r, c in path]
+        multipliers = profile["terrain_multipliers"]
+        adjusted_cost = [cost * multipliers.get(name, 1.0) for name, cost, _ in class_steps]
+        slopes = [step.slope for step in segment_steps]
+        avg_slope = sum(slopes) / len(slopes)
+        avg_terrain = sum([adjusted_cost[i] for i in path_ids]) / len(path_ids)
+        avg_exposure = sum([class_steps[i][2] for i in path_ids]) / len(path_ids)
 
         weights = profile["cost_weights"]
         score_breakdown = {
@@ -513,28 +845,22 @@ def generate_route_candidates(
             3,
         )
 
-        terrain_distance: Dict[str, float] = defaultdict(float)
-        hydrology_terms = ("wetland", "water")
-        hydrology_crossings = 0
+        # Distance per terrain as a dense sum over terrain ids
+        seg_dists = segment_lengths(np.asarray(path), dem.metadata.cell_size_m)
+        seg_ids = path_ids[1:]
+        totals = np.bincount(seg_ids, weights=seg_dists, minlength=len(grids.terrain_names))
+        totals = totals.tolist()
+        # Keyed in order of first appearance along the route
+        terrain_distance = {grids.terrain_names[i]: totals[i] for i in dict.fromkeys(seg_ids)}
+
+        # A crossing is every entry into hydrology; km markers only grow, so the first hydrology
+        # step is also the nearest
+        is_hydro = hydro_terrain[seg_ids]
+        entries = is_hydro & np.diff(is_hydro, prepend=False)
+        hydrology_crossings = int(np.count_nonzero(entries))
         nearest_hydro_m: Optional[float] = None
-        segment_steps = [step for step in steps if step.step_type == "segment"]
-        cell_size = dem.metadata.cell_size_m
-
-        prev_is_hydro = False
-        for idx in range(1, len(path)):
-            (r1, c1), (r2, c2) = path[idx - 1], path[idx]
-            terrain_name = landcover.grid[r2][c2]
-            seg_dist = cell_size * math.sqrt((r2 - r1) ** 2 + (c2 - c1) ** 2)
-            terrain_distance[terrain_name] += seg_dist
-            step = segment_steps[idx]
-            is_hydro = any(term in terrain_name.lower() for term in hydrology_terms)
-            if is_hydro and not prev_is_hydro:
-                hydrology_crossings += 1
-            if is_hydro:
-                distance_m = step.km_marker * 1000.0
-                if nearest_hydro_m is None or distance_m < nearest_hydro_m:
-                    nearest_hydro_m = distance_m
-            prev_is_hydro = is_hydro
+        if hydrology_crossings:
+            nearest_hydro_m = segment_steps[int(np.argmax(is_hydro)) + 1].km_marker * 1000.0
 
         coverage_km = {name: round(dist / 1000.0, 3) for name, dist in terrain_distance.items()}
         total_km = sum(coverage_km.values()) or 1.0
@@ -542,8 +868,8 @@ def generate_route_candidates(
             "surface_mix": {
                 f"{name}_pct": round((dist / total_km) * 100, 1) for name, dist in coverage_km.items()
             },
-            "avg_slope_deg": round(sum(step.slope for step in segment_steps) / len(segment_steps), 2),
-            "max_slope_deg": round(max(step.slope for step in segment_steps), 2),
+            "avg_slope_deg": round(avg_slope, 2),
+            "max_slope_deg": round(max(slopes), 2),
         }
         hydrology_check = {
             "crossings": hydrology_crossings,
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from statistics import mean
-from typing import Dict, Iterable
+from functools import lru_cache
+from typing import Dict, Iterable, List
 
-from .data_models import RouteCandidate, RouteRisk
+import numpy as np
+
+from .data_models import RouteCandidate, RouteRisk, RouteStep
 
 RISK_WEIGHTS = {"slope": 0.45, "exposure": 0.35, "hydrology": 0.2}
 RISK_FORMULA = "sum(w[i] * component[i])"
@@ -15,43 +17,74 @@ def _normalized(value: float, upper: float) -> float:
     return max(0.0, min(1.0, value / upper))
 
 
-def slope_risk(steps) -> float:
-    segment_steps = [step for step in steps if step.step_type == "segment"]
-    if not segment_steps:
+def _segment_steps(steps) -> List[RouteStep]:
+    return [step for step in steps if step.step_type == "segment"]
+
+
+def _slope_score(slopes: np.ndarray) -> float:
+    if not slopes.size:
         return 0.0
-    worst = max(step.slope for step in segment_steps)
-    avg = mean(step.slope for step in segment_steps)
+    worst = float(slopes.max())
+    avg = float(slopes.mean())
     score = 0.6 * _normalized(avg, 15.0) + 0.4 * _normalized(worst, 25.0)
     return round(min(score, 1.0), 3)
 
 
-def exposure_risk(steps) -> float:
-    segment_steps = [step for step in steps if step.step_type == "segment"]
-    if not segment_steps:
+def _exposure_score(exposures: np.ndarray) -> float:
+    if not exposures.size:
         return 0.0
-    avg_exposure = mean(step.exposure for step in segment_steps)
-    return round(_normalized(avg_exposure, 1.0), 3)
+    return round(_normalized(float(exposures.mean()), 1.0), 3)
 
 
-def hydrology_risk(steps) -> float:
-    segment_steps = [step for step in steps if step.step_type == "segment"]
-    if not segment_steps:
+@lru_cache(maxsize=256)
+def _hydrology_penalty(terrain: str) -> int:
+    """Open water counts double, wetland once; a route only has a handful of terrain names."""
+    lowered = terrain.lower()
+    return 2 * ("water" in lowered) + ("wetland" in lowered)
+
+
+def _hydrology_score(terrains: List[str]) -> float:
+    if not terrains:
         return 0.0
-    water_penalty = sum(1 for step in segment_steps if "water" in step.terrain.lower())
-    bog_penalty = sum(1 for step in segment_steps if "wetland" in step.terrain.lower())
-    total = len(segment_steps)
-    score = _normalized(water_penalty * 2 + bog_penalty, max(total, 1))
+    total = len(terrains)
+    score = _normalized(sum(map(_hydrology_penalty, terrains)), max(total, 1))
     return round(score, 3)
 
 
+def _slopes(segment_steps: List[RouteStep]) -> np.ndarray:
+    return np.fromiter(
+        (step.slope for step in segment_steps), dtype=np.float64, count=len(segment_steps)
+    )
+
+
+def _exposures(segment_steps: List[RouteStep]) -> np.ndarray:
+    return np.fromiter(
+        (step.exposure for step in segment_steps), dtype=np.float64, count=len(segment_steps)
+    )
+
+
+def slope_risk(steps) -> float:
+    return _slope_score(_slopes(_segment_steps(steps)))
+
+
+def exposure_risk(steps) -> float:
+    return _exposure_score(_exposures(_segment_steps(steps)))
+
+
+def hydrology_risk(steps) -> float:
+    return _hydrology_score([step.terrain for step in _segment_steps(steps)])
+
+
 def evaluate_routes(
     routes: Iterable[RouteCandidate],
 ) -> Dict[str, RouteRisk]:
     risk_map: Dict[str, RouteRisk] = {}
     for route in routes:
-        slope_component = slope_risk(route.steps)
-        exposure_component = exposure_risk(route.steps)
-        hydrology_component = hydrology_risk(route.steps)
+        # Filter the segments once and reduce each attribute as an array
+        segment_steps = _segment_steps(route.steps)
+        slope_component = _slope_score(_slopes(segment_steps))
+        exposure_component = _exposure_score(_exposures(segment_steps))
+        hydrology_component = _hydrology_score([step.terrain for step in segment_steps])
         risk = RouteRisk(
             route_id=route.id,
             slope_risk=slope_component,
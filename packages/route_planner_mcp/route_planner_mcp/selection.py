@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone, timedelta
+from heapq import nsmallest
 from typing import Any, Dict, Iterable, List, Optional
 
 from .data_models import (
@@ -23,13 +24,15 @@ def select_route(
     best_score = float("inf")
     rationale_parts = []
     evaluations = []
+    # One clock reading so every route's ETA is judged against the same moment
+    now = datetime.now(timezone.utc)
 
     for route in routes:
         risk = risks[route.id]
         pace = paces[route.id]
 
         if constraints.avoid_slope_degrees is not None:
-            if max(step.slope for step in route.steps) > constraints.avoid_slope_degrees:
+            if route.max_slope > constraints.avoid_slope_degrees:
                 rationale_parts.append(f"{route.id} rejected: slope above threshold")
                 continue
 
@@ -38,7 +41,6 @@ def select_route(
             continue
 
         if constraints.must_arrive_before is not None:
-            now = datetime.now(timezone.utc)
             arrival = now + timedelta(minutes=pace.travel_time_minutes)
             if arrival > constraints.must_arrive_before:
                 rationale_parts.append(f"{route.id} rejected: ETA past deadline")
@@ -81,7 +83,6 @@ def select_route(
     alternates: List[Dict[str, Any]] = []
     best_distance = best_choice.distance_m
     best_risk = risk
-    best_score = next(ev["score"] for ev in evaluations if ev["route"].id == best_choice.id)
     best_cost = best_choice.estimated_cost
     best_composite = best_choice.composite if best_choice.composite is not None else round(best_score, 3)
     for evaluation in evaluations:
@@ -151,10 +152,11 @@ def select_route(
 
     alternates.sort(key=lambda item: item["score"])
 
-    sorted_evals = sorted(evaluations, key=lambda item: item["score"])
+    # Only the runner-up is needed, so avoid sorting every evaluation
+    leading_evals = nsmallest(2, evaluations, key=lambda item: item["score"])
     tie_breaker = "lowest composite score"
-    if len(sorted_evals) > 1:
-        runner = sorted_evals[1]
+    if len(leading_evals) > 1:
+        runner = leading_evals[1]
         tie_breaker = (
             f"lowest composite score ({best_composite:.3f} vs {runner['score']:.3f}) "
             f"and lower estimated_cost ({best_cost:.3f} vs {runner['route'].estimated_cost:.3f})"
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 from mcp.server.fastmcp import FastMCP
 
 from .data_loader import (
+    bundle_vector_path,
     load_dem,
     load_landcover,
     load_obstacles,
@@ -22,8 +26,8 @@ from .data_models import (
     RouteSelectionResult,
 )
 from .exporter import export_all
-from .pathfinding import generate_route_candidates
-from .pace import estimate_travel_time
+from .pathfinding import clear_road_cache, generate_route_candidates, shutdown_profile_pool
+from .pace import estimate_travel_time_batch
 from .prompt_templates import NAV_BRIEF_PROMPT
 from .risk import evaluate_routes
 from .selection import select_route
@@ -34,12 +38,22 @@ SCHEMA = {
     "version": "1.2.0",
     "hash": "sha256:5a0d8a2f96f6c0b8f271f98f6b3a9a8bf5a6a338d250b1d7f4c684a8739d4d5a",
 }
+# Candidate sets kept per (start, end, max_candidates) for the terrain currently loaded
+ROUTE_CACHE_SIZE = 32
 
 
+# Dataset expiry times only change when terrain is reloaded, so every request formats the same few
+@lru_cache(maxsize=64)
 def _serialize_datetime(dt: Optional[datetime]) -> Optional[str]:
     return dt.isoformat() if dt else None
 
 
+def _fresh_candidate(candidate: RouteCandidate) -> RouteCandidate:
+    # Steps and metadata are never modified after generation, so they are shared; the engine
+    # renames candidates, stamps provenance and sets composite, so those get their own copies
+    return replace(candidate, provenance=dict(candidate.provenance))
+
+
 def route_to_dict(route: RouteCandidate) -> Dict[str, Any]:
     return {
         "id": route.id,
@@ -105,6 +119,8 @@ class RoutePlannerState:
     routes: Dict[str, RouteCandidate] = field(default_factory=dict)
     risks: Dict[str, RouteRisk] = field(default_factory=dict)
     paces: Dict[str, PaceEstimate] = field(default_factory=dict)
+    # Every estimate made for the current routes, by (route id, mode, load_kg)
+    pace_cache: Dict[Tuple[str, str, float], PaceEstimate] = field(default_factory=dict)
     selection: Optional[RouteSelectionResult] = None
 
 
@@ -117,6 +133,8 @@ class RoutePlannerEngine:
         self.obstacle_polys = obstacle_polygons(self.obstacles)
         self.state = RoutePlannerState()
         self._route_counter = 0
+        self._route_cache: OrderedDict[Tuple[Any, ...], List[RouteCandidate]] = OrderedDict()
+        self._terrain_provenance = self._dataset_timestamps()
 
     def reload_terrain(self, terrain_dir: str) -> None:
         """Reload terrain data from a specific directory (e.g., uploaded terrain bundle)."""
@@ -124,28 +142,49 @@ class RoutePlannerEngine:
         base_path = Path(terrain_dir)
         self.dem = load_dem(base_path / "dem.json")
         self.landcover = load_landcover(base_path / "landcover.json")
-        self.obstacles = load_obstacles(base_path / "obstacles.geojson")
-        self.roads = load_roads(base_path / "roads.geojson")
+        self.obstacles = load_obstacles(bundle_vector_path(base_path, "obstacles"))
+        self.roads = load_roads(bundle_vector_path(base_path, "roads"))
         self.obstacle_polys = obstacle_polygons(self.obstacles)
+        # Release the graph built for the previous roads instead of holding it until the next route
+        clear_road_cache()
+        self._route_cache.clear()
+        self._terrain_provenance = self._dataset_timestamps()
+
+    def _dataset_timestamps(self) -> Dict[str, str]:
+        # Fixed for as long as this terrain is loaded, so formatted once per load
+        return {
+            "dem_last_updated": self.dem.metadata.last_updated.isoformat(),
+            "landcover_last_updated": self.landcover.metadata.last_updated.isoformat(),
+        }
 
     def nav_route(self, params: Dict[str, Any]) -> Dict[str, Any]:
         start = tuple(params["start"])  # type: ignore[arg-type]
         end = tuple(params["end"])  # type: ignore[arg-type]
         max_candidates = params.get("max_candidates", 3)
-        candidates = generate_route_candidates(
-            start=start,
-            goal=end,
-            dem=self.dem,
-            landcover=self.landcover,
-            obstacle_polys=self.obstacle_polys,
-            roads=self.roads,
-            max_candidates=max_candidates,
-        )
-        if not candidates:
-            raise ValueError("No viable route found between the provided coordinates.")
+        key = (start, end, max_candidates)
+        cached = self._route_cache.get(key)
+        if cached is None:
+            candidates = generate_route_candidates(
+                start=start,
+                goal=end,
+                dem=self.dem,
+                landcover=self.landcover,
+                obstacle_polys=self.obstacle_polys,
+                roads=self.roads,
+                max_candidates=max_candidates,
+            )
+            if not candidates:
+                raise ValueError("No viable route found between the provided coordinates.")
+            self._route_cache[key] = [_fresh_candidate(candidate) for candidate in candidates]
+            if len(self._route_cache) > ROUTE_CACHE_SIZE:
+                self._route_cache.popitem(last=False)
+        else:
+            self._route_cache.move_to_end(key)
+            candidates = [_fresh_candidate(candidate) for candidate in cached]
         self.state.routes.clear()
         self.state.risks.clear()
         self.state.paces.clear()
+        self.state.pace_cache.clear()
         self.state.selection = None
         for candidate in candidates:
             self._route_counter += 1
@@ -158,8 +197,8 @@ class RoutePlannerEngine:
             "crs": CRS,
             "routes": [route_to_dict(route) for route in candidates],
             "provenance": {
-                "dem_last_updated": self.dem.metadata.last_updated.isoformat(),
-                "landcover_last_updated": self.landcover.metadata.last_updated.isoformat(),
+                **self._terrain_provenance,
+                # Expiry depends on the current time, so it is checked on every request
                 "ttl_status": [
                     {
                         "dataset": status.dataset,
@@ -180,8 +219,11 @@ class RoutePlannerEngine:
             routes = [self.state.routes[rid] for rid in route_ids]
         else:
             routes = list(self.state.routes.values())
-        risks = evaluate_routes(routes)
-        self.state.risks.update(risks)
+        # Risk depends only on the route, so routes already evaluated are not scored again
+        pending = [route for route in routes if route.id not in self.state.risks]
+        if pending:
+            self.state.risks.update(evaluate_routes(pending))
+        risks = {route.id: self.state.risks[route.id] for route in routes}
         for rid, risk in risks.items():
             candidate = self.state.routes.get(rid)
             if candidate:
@@ -198,18 +240,25 @@ class RoutePlannerEngine:
         mode = params.get("mode", "foot")
         load_kg = params.get("load_kg", 25.0)
         route_ids = params.get("route_ids") or list(self.state.routes.keys())
-        results = {}
         for route_id in route_ids:
             if route_id not in self.state.routes:
                 raise ValueError(f"Unknown route id: {route_id}")
-            route = self.state.routes[route_id]
-            pace = estimate_travel_time(route, mode, load_kg)
-            self.state.paces[route_id] = pace
-            results[route_id] = pace
+        # Deduplicate while keeping request order, as the previous per-route dict did
+        route_ids = list(dict.fromkeys(route_ids))
+        cache = self.state.pace_cache
+        pending = [route_id for route_id in route_ids if (route_id, mode, load_kg) not in cache]
+        if pending:
+            estimates = estimate_travel_time_batch(
+                [self.state.routes[route_id] for route_id in pending], mode, load_kg
+            )
+            for route_id, pace in zip(pending, estimates):
+                cache[(route_id, mode, load_kg)] = pace
+        paces = [cache[(route_id, mode, load_kg)] for route_id in route_ids]
+        self.state.paces.update(zip(route_ids, paces))
         return {
             "handling": HANDLING,
             "schema": SCHEMA,
-            "pace_estimates": [pace_to_dict(p) for p in results.values()],
+            "pace_estimates": [pace_to_dict(p) for p in paces],
         }
 
     def nav_select(self, params: Dict[str, Any]) -> Dict[str, Any]:
@@ -268,7 +317,18 @@ class RoutePlannerEngine:
 
 
 mcp = FastMCP("route-planner-mcp")
-ENGINE = RoutePlannerEngine()
+# The engine loads the default terrain, so it is built on first use rather than at import
+_engine: Optional[RoutePlannerEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> RoutePlannerEngine:
+    """Return the process-wide engine, loading the default terrain on first call."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = RoutePlannerEngine()
+        return _engine
 
 
 @mcp.tool(name="nav.route")
@@ -278,13 +338,13 @@ def nav_route(
     max_candidates: int = 3,
 ) -> Dict[str, Any]:
     """Generate 1–3 candidate routes between two coordinates."""
-    return ENGINE.nav_route({"start": start, "end": end, "max_candidates": max_candidates})
+    return get_engine().nav_route({"start": start, "end": end, "max_candidates": max_candidates})
 
 
 @mcp.tool(name="nav.risk_eval")
 def nav_risk_eval(route_ids: Optional[List[str]] = None) -> Dict[str, Any]:
     """Evaluate routes for slope, exposure, and hydrology risk with explicit weighting."""
-    return ENGINE.nav_risk_eval({"route_ids": route_ids})
+    return get_engine().nav_risk_eval({"route_ids": route_ids})
 
 
 @mcp.tool(name="nav.pace_estimator")
@@ -294,7 +354,7 @@ def nav_pace_estimator(
     route_ids: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
     """Estimate travel time using Naismith's rule with load/mode adjustments."""
-    return ENGINE.nav_pace_estimator(
+    return get_engine().nav_pace_estimator(
         {"mode": mode, "load_kg": load_kg, "route_ids": route_ids}
     )
 
@@ -308,7 +368,7 @@ def nav_select(
     prefer_low_risk: bool = True,
 ) -> Dict[str, Any]:
     """Select the best candidate route given commander constraints."""
-    return ENGINE.nav_select(
+    return get_engine().nav_select(
         {
             "route_ids": route_ids,
             "must_arrive_before": must_arrive_before,
@@ -326,7 +386,7 @@ def nav_export(basename: Optional[str] = None) -> Dict[str, Any]:
     Args:
         basename: Optional file stem for all exports (defaults to selected route id).
     """
-    return ENGINE.nav_export({"basename": basename})
+    return get_engine().nav_export({"basename": basename})
 
 
 @mcp.prompt(name="@nav/brief")
@@ -336,7 +396,12 @@ def nav_brief_prompt() -> str:
 
 
 def main() -> None:
-    mcp.run(transport="stdio")
+    # Load terrain in the background while the stdio handshake completes
+    threading.Thread(target=get_engine, name="engine-warmup", daemon=True).start()
+    try:
+        mcp.run(transport="stdio")
+    finally:
+        shutdown_profile_pool()
 
 
 def run() -> None:
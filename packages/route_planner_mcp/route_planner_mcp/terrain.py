@@ -1,19 +1,27 @@
 from __future__ import annotations
 
 import math
-from typing import Dict, List, Tuple
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
 
 from .data_models import Coordinate, DEMData, LandcoverData, RouteStep
 
 
+# Approximate metres per degree of latitude, and a rough average per degree of longitude that is
+# adequate for small areas
+METERS_PER_DEGREE_LAT = 111_320.0
+METERS_PER_DEGREE_LON = 85_000.0
+
+
 def coordinate_to_grid(
     coord: Coordinate, dem: DEMData
 ) -> Tuple[int, int]:
     lat, lon = coord
     origin_lat, origin_lon = dem.metadata.origin
     cell = dem.metadata.cell_size_m
-    northing = (lat - origin_lat) * 111_320.0  # approximate meters per degree latitude
-    easting = (lon - origin_lon) * 85_000.0  # rough average, adequate for small areas
+    northing = (lat - origin_lat) * METERS_PER_DEGREE_LAT
+    easting = (lon - origin_lon) * METERS_PER_DEGREE_LON
     row = int(round(northing / cell))
     col = int(round(easting / cell))
     return row, col
@@ -22,54 +30,57 @@ def coordinate_to_grid(
 def grid_to_coordinate(row: int, col: int, dem: DEMData) -> Coordinate:
     origin_lat, origin_lon = dem.metadata.origin
     cell = dem.metadata.cell_size_m
-    lat = origin_lat + (row * cell) / 111_320.0
-    lon = origin_lon + (col * cell) / 85_000.0
+    lat = origin_lat + (row * cell) / METERS_PER_DEGREE_LAT
+    lon = origin_lon + (col * cell) / METERS_PER_DEGREE_LON
     return (round(lat, 6), round(lon, 6))
 
 
-def in_bounds(row: int, col: int, dem: DEMData) -> bool:
-    return 0 <= row < dem.height and 0 <= col < dem.width
-
-
-def slope_between(
-    dem: DEMData, r1: int, c1: int, r2: int, c2: int
-) -> float:
-    elev1 = dem.grid[r1][c1]
-    elev2 = dem.grid[r2][c2]
-    delta_h = elev2 - elev1
-    dist_m = dem.metadata.cell_size_m * math.sqrt((r2 - r1) ** 2 + (c2 - c1) ** 2)
-    if dist_m == 0:
-        return 0.0
-    slope = math.degrees(math.atan(abs(delta_h) / dist_m))
-    return slope
+def grid_to_coordinates(rows: np.ndarray, cols: np.ndarray, dem: DEMData) -> np.ndarray:
+    """grid_to_coordinate for arrays of rows and columns, as an (N, 2) array of (lat, lon)."""
+    origin_lat, origin_lon = dem.metadata.origin
+    cell = dem.metadata.cell_size_m
+    lats = origin_lat + (rows * cell) / METERS_PER_DEGREE_LAT
+    lons = origin_lon + (cols * cell) / METERS_PER_DEGREE_LON
+    return np.round(np.column_stack((lats, lons)), 6)
 
 
-def local_slope(dem: DEMData, row: int, col: int) -> float:
-    neighbors = [
-        (row + dr, col + dc)
-        for dr in (-1, 0, 1)
-        for dc in (-1, 0, 1)
-        if not (dr == 0 and dc == 0)
-    ]
-    slopes: List[float] = []
-    for nr, nc in neighbors:
-        if in_bounds(nr, nc, dem):
-            slopes.append(slope_between(dem, row, col, nr, nc))
-    return max(slopes) if slopes else 0.0
+def in_bounds(row: int, col: int, dem: DEMData) -> bool:
+    return 0 <= row < dem.height and 0 <= col < dem.width
 
 
-def terrain_cost(
-    landcover: LandcoverData, row: int, col: int
-) -> float:
-    cover = landcover.grid[row][col]
-    return landcover.classes[cover].cost_factor
+def max_slope_raster(dem: DEMData) -> np.ndarray:
+    """Steepest slope in degrees from each cell to any of its eight neighbours.
+
+    Computed on first use and kept on the DEM.
+    """
+    if dem._max_slopes is None:
+        elevations = dem.grid
+        height, width = elevations.shape
+        cell = dem.metadata.cell_size_m
+        steepest = np.zeros((height, width))
+        # Each forward step pairs every cell with one neighbour; the reverse step is the same
+        # pair, so both ends take the gradient
+        for dr, dc in ((0, 1), (1, -1), (1, 0), (1, 1)):
+            c0, c1 = max(0, -dc), width - max(0, dc)
+            here = (slice(0, height - dr), slice(c0, c1))
+            there = (slice(dr, height), slice(c0 + dc, c1 + dc))
+            gradient = np.abs(elevations[there] - elevations[here]) / (
+                cell * math.sqrt(dr**2 + dc**2)
+            )
+            np.maximum(steepest[here], gradient, out=steepest[here])
+            np.maximum(steepest[there], gradient, out=steepest[there])
+        # arctan is monotonic, so the steepest gradient gives the steepest slope
+        dem._max_slopes = np.degrees(np.arctan(steepest))
+    return dem._max_slopes
 
 
-def exposure_score(
-    landcover: LandcoverData, row: int, col: int
-) -> float:
-    cover = landcover.grid[row][col]
-    return landcover.classes[cover].exposure
+def segment_lengths(cells: np.ndarray, cell_size: float) -> np.ndarray:
+    """Length in metres of each move along an 8-connected (N, 2) path of cells."""
+    squared_steps = (np.diff(cells, axis=0) ** 2).sum(axis=1)
+    if squared_steps.size and squared_steps.max() > 2:
+        raise ValueError("Route path is not 8-connected")
+    # A move is straight or diagonal, so its length is one of three values looked up by dr² + dc²
+    return (cell_size * np.sqrt(np.arange(3.0)))[squared_steps]
 
 
 def assemble_route_steps(
@@ -82,23 +93,33 @@ def assemble_route_steps(
     if not path:
         return steps
 
-    cumulative_m = 0.0
+    # Gather every per-step attribute for the whole path up front; the loop only builds steps
+    cells = np.asarray(path, dtype=np.intp)
+    rows, cols = cells[:, 0], cells[:, 1]
+    codes = landcover.codes[rows, cols].tolist()
+    class_steps = landcover.step_attributes
+    coords = grid_to_coordinates(rows, cols, dem).tolist()
+    slopes = max_slope_raster(dem)[rows, cols].tolist()
+    elevations = dem.grid[rows, cols]
+    # Integer DEMs keep integer step elevations, as they read from the source JSON
+    elevations = (elevations.astype(np.int64) if dem.integral else elevations).tolist()
+    segments = segment_lengths(cells, dem.metadata.cell_size_m)
+    # cumsum adds in path order, so these match a running total exactly
+    cumulative = [0.0] + np.cumsum(segments).tolist()
+
     last_checkpoint_m = 0.0
-    prev_row, prev_col = path[0]
-    last_terrain = landcover.grid[prev_row][prev_col]
-    cell = dem.metadata.cell_size_m
+    last_code = codes[0]
+    last_terrain = class_steps[last_code][0]
     checkpoint_counter = 0
 
-    for segment_id, (row, col) in enumerate(path, start=1):
-        if segment_id > 1:
-            seg_dist = cell * math.sqrt((row - prev_row) ** 2 + (col - prev_col) ** 2)
-            cumulative_m += seg_dist
-            prev_row, prev_col = row, col
-        coord = grid_to_coordinate(row, col, dem)
-        slope = round(local_slope(dem, row, col), 2)
-        terrain = landcover.grid[row][col]
-        cost = terrain_cost(landcover, row, col)
-        exposure = exposure_score(landcover, row, col)
+    for idx in range(len(path)):
+        segment_id = idx + 1
+        cumulative_m = cumulative[idx]
+        coord = tuple(coords[idx])
+        slope = round(slopes[idx], 2)
+        code = codes[idx]
+        terrain, cost, exposure = class_steps[code]
+        elevation = elevations[idx]
         km_marker = round(cumulative_m / 1000.0, 3)
         base_step = RouteStep(
             segment_id=segment_id,
@@ -107,7 +128,7 @@ def assemble_route_steps(
             terrain=terrain,
             cost=cost,
             exposure=exposure,
-            elevation=dem.grid[row][col],
+            elevation=elevation,
             step_type="segment",
             km_marker=km_marker,
             label=None,
@@ -115,14 +136,14 @@ def assemble_route_steps(
         steps.append(base_step)
 
         should_checkpoint = False
-        if terrain != last_terrain and segment_id > 1:
+        if code != last_code and segment_id > 1:
             should_checkpoint = True
         elif cumulative_m - last_checkpoint_m >= checkpoint_interval_m and segment_id > 1:
             should_checkpoint = True
 
         if should_checkpoint:
             checkpoint_counter += 1
-            if terrain != last_terrain:
+            if code != last_code:
                 reason = f"Terrain {last_terrain}→{terrain}"
             else:
                 reason = f"Distance {int(cumulative_m)} m"
@@ -134,36 +155,28 @@ def assemble_route_steps(
                 terrain=terrain,
                 cost=cost,
                 exposure=exposure,
-                elevation=dem.grid[row][col],
+                elevation=elevation,
                 step_type="checkpoint",
                 km_marker=km_marker,
                 label=label,
             )
             steps.append(checkpoint_step)
             last_checkpoint_m = cumulative_m
-        last_terrain = terrain
+        last_code, last_terrain = code, terrain
 
     return steps
 
 
 def route_distance_and_elevation(
-    path: List[Tuple[int, int]], dem: DEMData
+    path: Sequence[Tuple[int, int]] | np.ndarray, dem: DEMData
 ) -> Tuple[float, float, float]:
-    if len(path) < 2:
+    cells = np.asarray(path, dtype=np.intp)
+    if len(cells) < 2:
         return (0.0, 0.0, 0.0)
-    dist = 0.0
-    ascent = 0.0
-    descent = 0.0
-    cell = dem.metadata.cell_size_m
-    for (r1, c1), (r2, c2) in zip(path[:-1], path[1:]):
-        elev1 = dem.grid[r1][c1]
-        elev2 = dem.grid[r2][c2]
-        segment = cell * math.sqrt((r2 - r1) ** 2 + (c2 - c1) ** 2)
-        dist += segment
-        if elev2 > elev1:
-            ascent += elev2 - elev1
-        else:
-            descent += elev1 - elev2
-    return (dist, ascent, descent)
-
-
+    segments = segment_lengths(cells, dem.metadata.cell_size_m)
+    elevations = dem.grid[cells[:, 0], cells[:, 1]]
+    steps = np.diff(elevations)
+    ascent = np.maximum(steps, 0.0).sum()
+    # Summed directly rather than derived from the net change, which yields -0.0 when all uphill
+    descent = np.maximum(-steps, 0.0).sum()
+    return (float(segments.sum()), float(ascent), float(descent))
@@ -9,6 +9,8 @@ import anyio
 from mcp.client.session import ClientSession
 from mcp.client.stdio import StdioServerParameters, stdio_client
 
+from ._json import dumps
+
 
 async def _call_tool(tool_name: str, arguments: dict[str, Any]) -> dict[str, Any]:
     server_cmd = StdioServerParameters(
@@ -53,7 +55,7 @@ def main() -> None:
         raise SystemExit(f"Invalid JSON for --args: {exc}") from exc
 
     response = call_tool(args.tool, arguments)
-    print(json.dumps(response, indent=2))
+    print(dumps(response, pretty=True).decode("utf-8"))
 
 
 if __name__ == "__main__":
@@ -4,6 +4,7 @@ Convert standard geospatial data formats into route planner terrain bundle forma
 
 Requirements:
     pip install rasterio geopandas shapely numpy
+    pip install orjson  # optional, writes the output JSON faster
 
 Usage:
     python convert_terrain_data.py --dem <dem.tif> --landcover <landcover.tif> --roads <roads.shp> --output <bundle_name>
@@ -17,33 +18,78 @@ from pathlib import Path
 import geopandas as gpd
 import numpy as np
 import rasterio
+from rasterio.transform import Affine
 from rasterio.warp import calculate_default_transform, reproject, Resampling
 from shapely.geometry import mapping
 
+try:
+    import orjson
+except ImportError:  # optional; fall back to the standard library encoder
+    orjson = None
+
+
+# Simplified land cover type for each NLCD class code
+NLCD_LANDCOVER_TYPES = {
+    11: "water",
+    21: "developed",
+    22: "developed",
+    23: "developed",
+    24: "developed",
+    31: "barren",
+    41: "forest",
+    42: "forest",
+    43: "forest",
+    52: "shrub",
+    71: "grassland",
+    81: "pasture",
+    82: "crops",
+    90: "wetlands",
+    95: "wetlands",
+}
+
+
+def write_json(payload, output_path: Path):
+    """Write payload as compact JSON; NumPy array columns are written without tolist()."""
+    if orjson is not None:
+        output_path.write_bytes(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(output_path, 'w') as f:
+            json.dump(payload, f, separators=(",", ":"), default=np.ndarray.tolist)
+
+
+def read_sampled(src, resampling):
+    """
+    Read band 1 at about 100 columns, returning it with the coordinates of each sample.
+    
+    Each sample summarises a block of source pixels, so it is placed at the centre of that
+    block as given by the resampled transform. The target shape matches the former
+    every-Nth-pixel sampling.
+    """
+    height, width = src.height, src.width
+    sample_factor = max(1, width // 100)
+    out_height, out_width = -(-height // sample_factor), -(-width // sample_factor)
+    data = src.read(1, out_shape=(out_height, out_width), resampling=resampling)
+    transform = src.transform * Affine.scale(width / out_width, height / out_height)
+    xs = transform.c + (np.arange(out_width) + 0.5) * transform.a
+    ys = transform.f + (np.arange(out_height) + 0.5) * transform.e
+    sampling = {"factor": sample_factor, "resampling": resampling.name, "points": "block_centers"}
+    return data, xs, ys, sampling
+
 
 def convert_dem_to_json(dem_path: Path, output_path: Path, bounds=None):
     """Convert DEM GeoTIFF to JSON format."""
     print(f"Converting DEM: {dem_path}")
     
     with rasterio.open(dem_path) as src:
-        # Read the DEM data
-        dem_data = src.read(1)
-        transform = src.transform
-        
         # Get bounds
         if bounds is None:
             bounds = src.bounds
         
-        # Create grid of coordinates
-        height, width = dem_data.shape
-        xs = np.linspace(bounds.left, bounds.right, width)
-        ys = np.linspace(bounds.top, bounds.bottom, height)
+        height, width = src.height, src.width
         
-        # Sample data (reduce resolution if too large)
-        sample_factor = max(1, width // 100)
-        dem_sampled = dem_data[::sample_factor, ::sample_factor]
-        xs_sampled = xs[::sample_factor]
-        ys_sampled = ys[::sample_factor]
+        # Read the DEM straight at the sampled resolution, averaging each block, so the
+        # discarded pixels are never decoded
+        dem_sampled, xs_sampled, ys_sampled, sampling = read_sampled(src, Resampling.average)
         
         # Create output structure
         dem_json = {
@@ -59,24 +105,22 @@ def convert_dem_to_json(dem_path: Path, output_path: Path, bounds=None):
                 "x": (bounds.right - bounds.left) / width,
                 "y": (bounds.top - bounds.bottom) / height
             },
-            "data": []
+            "sampling": sampling,
+            "data": {}
         }
         
-        # Add elevation points
-        for i, y in enumerate(ys_sampled):
-            for j, x in enumerate(xs_sampled):
-                elevation = float(dem_sampled[i, j])
-                if not np.isnan(elevation):
-                    dem_json["data"].append({
-                        "lat": float(y),
-                        "lon": float(x),
-                        "elevation": elevation
-                    })
+        # Elevation points as parallel columns, row by row, skipping NaN cells
+        elevations = dem_sampled.astype(np.float64)
+        rows, cols = np.nonzero(~np.isnan(elevations))
+        dem_json["data"] = {
+            "lat": ys_sampled[rows],
+            "lon": xs_sampled[cols],
+            "elevation": elevations[rows, cols],
+        }
         
-        print(f"  Processed {len(dem_json['data'])} elevation points")
+        print(f"  Processed {len(dem_json['data']['elevation'])} elevation points")
         
-        with open(output_path, 'w') as f:
-            json.dump(dem_json, f, indent=2)
+        write_json(dem_json, output_path)
         
         print(f"  Saved to: {output_path}")
 
@@ -86,20 +130,12 @@ def convert_landcover_to_json(landcover_path: Path, output_path: Path, bounds=No
     print(f"Converting Land Cover: {landcover_path}")
     
     with rasterio.open(landcover_path) as src:
-        landcover_data = src.read(1)
-        
         if bounds is None:
             bounds = src.bounds
         
-        height, width = landcover_data.shape
-        xs = np.linspace(bounds.left, bounds.right, width)
-        ys = np.linspace(bounds.top, bounds.bottom, height)
-        
-        # Sample data
-        sample_factor = max(1, width // 100)
-        lc_sampled = landcover_data[::sample_factor, ::sample_factor]
-        xs_sampled = xs[::sample_factor]
-        ys_sampled = ys[::sample_factor]
+        # Read straight at the sampled resolution; classes are categorical, so each block
+        # takes its most common class rather than an average
+        lc_sampled, xs_sampled, ys_sampled, sampling = read_sampled(src, Resampling.mode)
         
         landcover_json = {
             "type": "LandCover",
@@ -110,49 +146,33 @@ def convert_landcover_to_json(landcover_path: Path, output_path: Path, bounds=No
                 "maxx": bounds.right,
                 "maxy": bounds.top
             },
-            "data": []
+            "sampling": sampling,
+            "data": {}
         }
         
-        # Add land cover points
-        for i, y in enumerate(ys_sampled):
-            for j, x in enumerate(xs_sampled):
-                lc_value = int(lc_sampled[i, j])
-                if lc_value > 0:
-                    landcover_json["data"].append({
-                        "lat": float(y),
-                        "lon": float(x),
-                        "class": lc_value,
-                        "type": get_landcover_type(lc_value)
-                    })
+        # Land cover points as parallel columns, row by row, skipping unclassified cells;
+        # each class code's type name is listed once under "types"
+        rows, cols = np.nonzero(lc_sampled > 0)
+        classes = lc_sampled[rows, cols].astype(np.int64)
+        landcover_json["data"] = {
+            "lat": ys_sampled[rows],
+            "lon": xs_sampled[cols],
+            "class": classes,
+        }
+        landcover_json["types"] = {
+            str(value): get_landcover_type(value) for value in np.unique(classes).tolist()
+        }
         
-        print(f"  Processed {len(landcover_json['data'])} land cover points")
+        print(f"  Processed {len(landcover_json['data']['class'])} land cover points")
         
-        with open(output_path, 'w') as f:
-            json.dump(landcover_json, f, indent=2)
+        write_json(landcover_json, output_path)
         
         print(f"  Saved to: {output_path}")
 
 
 def get_landcover_type(value: int) -> str:
     """Map NLCD codes to simplified land cover types."""
-    landcover_map = {
-        11: "water",
-        21: "developed",
-        22: "developed",
-        23: "developed",
-        24: "developed",
-        31: "barren",
-        41: "forest",
-        42: "forest",
-        43: "forest",
-        52: "shrub",
-        71: "grassland",
-        81: "pasture",
-        82: "crops",
-        90: "wetlands",
-        95: "wetlands",
-    }
-    return landcover_map.get(value, "unknown")
+    return NLCD_LANDCOVER_TYPES.get(value, "unknown")
 
 
 def convert_roads_to_geojson(roads_path: Path, output_path: Path, bounds=None):
@@ -162,8 +182,8 @@ def convert_roads_to_geojson(roads_path: Path, output_path: Path, bounds=None):
     # Read file (geopandas handles both shapefiles and GeoJSON)
     gdf = gpd.read_file(roads_path)
     
-    # Ensure CRS is WGS84
-    if gdf.crs != "EPSG:4326":
+    # Ensure CRS is WGS84; equivalent definitions such as OGC:CRS84 need no reprojection
+    if gdf.crs is not None and not gdf.crs.equals("EPSG:4326", ignore_axis_order=True):
         gdf = gdf.to_crs("EPSG:4326")
     
     # Filter by bounds if provided
@@ -173,18 +193,20 @@ def convert_roads_to_geojson(roads_path: Path, output_path: Path, bounds=None):
     # Simplify geometries to reduce file size
     gdf.geometry = gdf.geometry.simplify(0.0001)
     
-    # Convert to GeoJSON structure
-    features = []
-    for idx, row in gdf.iterrows():
-        if row.geometry.geom_type in ['LineString', 'MultiLineString']:
-            features.append({
-                "type": "Feature",
-                "geometry": mapping(row.geometry),
-                "properties": {
-                    "id": idx,
-                    "type": "road"
-                }
-            })
+    # Convert to GeoJSON structure, keeping only line geometries; filtering on the
+    # GeoSeries avoids materialising a pandas row per feature
+    lines = gdf.geometry[gdf.geom_type.isin(['LineString', 'MultiLineString'])]
+    features = [
+        {
+            "type": "Feature",
+            "geometry": mapping(geometry),
+            "properties": {
+                "id": idx,
+                "type": "road"
+            }
+        }
+        for idx, geometry in zip(lines.index, lines)
+    ]
     
     geojson = {
         "type": "FeatureCollection",
@@ -193,8 +215,7 @@ def convert_roads_to_geojson(roads_path: Path, output_path: Path, bounds=None):
     
     print(f"  Processed {len(features)} road features")
     
-    with open(output_path, 'w') as f:
-        json.dump(geojson, f, indent=2)
+    write_json(geojson, output_path)
     
     print(f"  Saved to: {output_path}")
 
@@ -208,8 +229,7 @@ def create_empty_obstacles(output_path: Path):
         "features": []
     }
     
-    with open(output_path, 'w') as f:
-        json.dump(geojson, f, indent=2)
+    write_json(geojson, output_path)
     
     print(f"  Saved to: {output_path}")
 